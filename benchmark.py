@@ -0,0 +1,472 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+
+from fuzzy import OCR_CONFUSIONS, FuzzyMatcher
+from infix import InfixIndex
+from scoring import WordScorer
+from strategy import LastLetterStrategy
+from word_index import PrefixIndex, prefix_successor
+from word_store import CompiledDictionary, compile_dictionary, format_bytes, read_words_json
+
+# Rough English letter frequencies, so prefix fan-out looks like a real list
+LETTER_WEIGHTS = {
+    'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7, 's': 6.3, 'h': 6.1,
+    'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8, 'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2,
+    'g': 2.0, 'y': 2.0, 'p': 1.9, 'b': 1.5, 'v': 1.0, 'k': 0.8, 'j': 0.2, 'x': 0.2,
+    'q': 0.1, 'z': 0.1
+}
+LENGTH_WEIGHTS = {3: 4, 4: 8, 5: 11, 6: 13, 7: 13, 8: 12, 9: 10, 10: 8, 11: 6, 12: 5, 13: 4, 14: 3}
+DEFAULT_SIZES = [10000, 100000, 300000, 1000000, 2000000]
+
+
+class LegacyCompleter:
+    """The original find_completion, kept as the reference engine.
+
+    Mirrors the old four-character prefix dict and candidate filtering.
+    Played words are tracked match-wide, as find_completion now does,
+    instead of in the old per-prefix used_words sets. The original broke
+    length ties in set iteration order, which depends on the hash seed;
+    ties here are broken alphabetically, which is the order the indexed
+    engines use.
+    """
+
+    def __init__(self, words, min_length):
+        self.min_length = min_length
+        self.word_index = defaultdict(list)
+        for word in words:
+            if len(word) >= min_length:
+                for i in range(1, min(len(word) + 1, 5)):
+                    self.word_index[word[:i].lower()].append(word.lower())
+        self.played = set()
+
+    def complete(self, prefix, longest_first=True, min_length=None):
+        possible = set()
+        for key in self.word_index:
+            if key.startswith(prefix):
+                possible.update(self.word_index[key])
+
+        candidates = [w for w in possible
+                      if w.startswith(prefix) and w != prefix and w not in self.played]
+        cycled = False
+        if not candidates:
+            candidates = [w for w in possible if w.startswith(prefix) and w != prefix]
+            if not candidates:
+                return None, False
+            self.played.difference_update(candidates)
+            cycled = True
+
+        candidates.sort()
+        candidates.sort(key=len, reverse=longest_first)
+        word = candidates[0]
+        self.played.add(word)
+        return word, cycled
+
+
+class ReferenceEngine:
+    """Scan-based stand-in for one of the newer engines: same picks, no index.
+
+    Candidates are found by walking a sorted word list and ranked in plain
+    Python. Played words and cycling follow the engines' shared rule: the
+    best unplayed candidate is picked, and once every candidate is played
+    only that query's candidates are released. The base class completes
+    prefixes by length, then alphabetically.
+    """
+
+    def __init__(self, words):
+        self.words = sorted({word.lower() for word in words})
+        self.played = set()
+
+    def candidates(self, query, min_length):
+        lo = bisect_left(self.words, query)
+        hi = bisect_left(self.words, prefix_successor(query), lo)
+        return [w for w in self.words[lo:hi] if w != query and len(w) >= min_length]
+
+    def pick(self, free, longest_first):
+        return min(free, key=lambda w: (-len(w) if longest_first else len(w), w))
+
+    def mark(self, word):
+        self.played.add(word)
+
+    def release(self, words):
+        self.played.difference_update(words)
+
+    def complete(self, query, longest_first=True, min_length=1):
+        eligible = self.candidates(query, min_length)
+        free = [w for w in eligible if w not in self.played]
+        cycled = False
+        if not free:
+            if not eligible:
+                return None, False
+            self.release(eligible)
+            free = eligible
+            cycled = True
+        word = self.pick(free, longest_first)
+        self.mark(word)
+        return word, cycled
+
+
+class ReferenceInfix(ReferenceEngine):
+    """Contains mode: every word holding the fragment somewhere"""
+
+    def candidates(self, fragment, min_length):
+        return [w for w in self.words if fragment in w and w != fragment and len(w) >= min_length]
+
+
+class ReferenceStrategy(ReferenceEngine):
+    """Strategy mode: fewest replies left to the opponent, from live letter counts"""
+
+    def __init__(self, words, lookahead):
+        super().__init__(words)
+        self.lookahead = lookahead
+        self.starts = Counter(w[0] for w in self.words)
+        self.pairs = Counter((w[0], w[-1]) for w in self.words)
+
+    def count(self, word, delta):
+        self.starts[word[0]] += delta
+        self.pairs[word[0], word[-1]] += delta
+
+    def mark(self, word):
+        if word not in self.played:
+            self.count(word, -1)
+        super().mark(word)
+
+    def release(self, words):
+        for word in words:
+            if word in self.played:
+                self.count(word, 1)
+        super().release(words)
+
+    def floor(self, letter):
+        """Fewest words left to us after the opponent's best reply to letter"""
+        return min((self.starts[last] for (first, last), n in self.pairs.items() if first == letter and n > 0),
+                   default=float('inf'))
+
+    def pick(self, free, longest_first):
+        floors = {}
+        for w in free:
+            if w[-1] not in floors:
+                floors[w[-1]] = self.floor(w[-1]) if self.lookahead else 0
+
+        def key(w):
+            options = self.starts[w[-1]] - (w[0] == w[-1])
+            return options, -floors[w[-1]], -len(w) if longest_first else len(w), w
+        return min(free, key=key)
+
+
+class ReferenceScorer(ReferenceEngine):
+    """Weighted scoring: highest score first, ties alphabetical.
+
+    Scores come from the scorer's own feature columns, so this checks
+    candidate selection, ranking, played words and cycling, not how the
+    features are computed.
+    """
+
+    def __init__(self, words, scores):
+        super().__init__(words)
+        self.scores = dict(zip(self.words, scores.tolist()))
+
+    def pick(self, free, longest_first):
+        return min(free, key=lambda w: (-self.scores[w], w))
+
+
+class ReferenceInfixStrategy(ReferenceInfix, ReferenceStrategy):
+    """Contains mode ranked by the strategy"""
+
+
+class ReferenceInfixScorer(ReferenceInfix, ReferenceScorer):
+    """Contains mode ranked by weighted scores"""
+
+
+def generate_words(count, seed=0):
+    """Generate count distinct pseudo-English words"""
+    rnd = random.Random(seed)
+    letters = list(LETTER_WEIGHTS)
+    letter_weights = list(LETTER_WEIGHTS.values())
+    lengths = list(LENGTH_WEIGHTS)
+    length_weights = list(LENGTH_WEIGHTS.values())
+    words = set()
+    while len(words) < count:
+        batch = min(count - len(words), 100000)
+        for length in rnd.choices(lengths, length_weights, k=batch):
+            words.add(''.join(rnd.choices(letters, letter_weights, k=length)))
+    words = list(words)
+    rnd.shuffle(words)
+    return words
+
+
+def generate_workload(words, count, seed=1):
+    """Prefix queries as a player would issue them.
+
+    Mostly fresh 1-4 letter prefixes of real words, with runs where the
+    same prefix is pressed repeatedly to cycle through its completions.
+    """
+    rnd = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        word = rnd.choice(words)
+        prefix = word[:rnd.choice((1, 2, 2, 3, 3, 3, 4))]
+        repeats = rnd.choice((1, 1, 1, 2, 5, 20))
+        queries.extend([prefix] * repeats)
+    return queries[:count]
+
+
+def misread(queries, seed=2):
+    """Copies of queries with one letter swapped as OCR would misread it"""
+    rnd = random.Random(seed)
+    swaps = defaultdict(list)
+    for a, b in OCR_CONFUSIONS:
+        swaps[a].append(b)
+        swaps[b].append(a)
+    letters = list(LETTER_WEIGHTS)
+    misread_queries = []
+    for prefix in queries:
+        i = rnd.randrange(len(prefix))
+        letter = rnd.choice(swaps.get(prefix[i]) or letters)
+        misread_queries.append(prefix[:i] + letter + prefix[i + 1:])
+    return misread_queries
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_queries(engine, queries, longest_first=True, min_length=4):
+    """Return (results, sorted per-query latencies in microseconds)"""
+    results = []
+    latencies = []
+    clock = time.perf_counter_ns
+    for prefix in queries:
+        start = clock()
+        result = engine.complete(prefix, longest_first, min_length)
+        latencies.append((clock() - start) / 1000)
+        results.append(result)
+    latencies.sort()
+    return results, latencies
+
+
+def measure(build):
+    """Return (result, seconds, peak traced bytes) for one build step"""
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+
+    # Second pass under tracemalloc, which would skew the timing
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_size(size, query_count, legacy_limit, workdir):
+    """Benchmark every engine on one synthetic dictionary"""
+    words = generate_words(size)
+    queries = generate_workload(words, query_count)
+    json_path = os.path.join(workdir, f'words_{size}.json')
+    bin_path = os.path.join(workdir, f'words_{size}.bin')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'words': words}, f)
+    del words
+
+    rows = []
+    loaded, load_time, load_peak = measure(lambda: read_words_json(json_path))
+
+    if size <= legacy_limit:
+        engine, build_time, peak = measure(lambda: LegacyCompleter(loaded, 4))
+        rows.append(('legacy', load_time, build_time, max(load_peak, peak), 0, engine))
+
+    engine, build_time, peak = measure(lambda: PrefixIndex(loaded))
+    usage = engine.memory_usage()
+    rows.append(('packed', load_time, build_time, max(load_peak, peak), usage['mapped'], engine))
+
+    compile_start = time.perf_counter()
+    compile_dictionary(json_path, bin_path)
+    compile_time = time.perf_counter() - compile_start
+    del loaded
+
+    engine, open_time, peak = measure(lambda: PrefixIndex(CompiledDictionary(bin_path)))
+    usage = engine.memory_usage()
+    rows.append(('compiled', open_time, 0.0, peak, usage['mapped'], engine))
+
+    print(f"\n{size:,} words  ({query_count:,} queries, compile {compile_time:.2f}s, "
+          f"words.json {format_bytes(os.path.getsize(json_path))}, "
+          f"words.bin {format_bytes(os.path.getsize(bin_path))})")
+    print(f"  {'engine':<9}{'load':>9}{'build':>9}{'peak heap':>12}{'mapped':>11}"
+          f"{'p50 us':>10}{'p99 us':>10}")
+    for name, load_s, build_s, peak, mapped, engine in rows:
+        engine_queries = queries if name != 'legacy' else queries[:max(1, query_count // 10)]
+        _, latencies = run_queries(engine, engine_queries)
+        print(f"  {name:<9}{load_s:>8.3f}s{build_s:>8.3f}s{format_bytes(peak):>12}"
+              f"{format_bytes(mapped):>11}{percentile(latencies, 0.5):>10.1f}"
+              f"{percentile(latencies, 0.99):>10.1f}")
+        if name == 'compiled':
+            engine.words.close()
+
+    # Fuzzy lookup only runs on misses, so time it on misread 2-5 letter prefixes
+    engine = rows[-2][-1]
+    fuzzy_start = time.perf_counter()
+    matcher = FuzzyMatcher(engine)
+    fuzzy_build = time.perf_counter() - fuzzy_start
+    fuzzy_queries = misread([q for q in queries[:max(1, query_count // 10)] if len(q) >= 2])
+    latencies = []
+    for prefix in fuzzy_queries:
+        start = time.perf_counter_ns()
+        matcher.corrections(prefix)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    latencies.sort()
+    print(f"  {'fuzzy':<9}{'':>9}{fuzzy_build:>8.3f}s{'':>12}{'':>11}"
+          f"{percentile(latencies, 0.5):>10.1f}{percentile(latencies, 0.99):>10.1f}")
+
+
+def compare(name, queries, expected, actual, shown):
+    """Count differing picks, printing the first few; shown is how many were printed before"""
+    mismatches = 0
+    for query, want, got in zip(queries, expected, actual):
+        if want != got:
+            mismatches += 1
+            if shown + mismatches <= 10:
+                print(f"  MISMATCH {name} '{query}': reference {want} != {got}")
+    return mismatches
+
+
+def check_newer_engines(words, queries, min_length=4):
+    """Compare strategy, scoring and contains-mode picks with the reference engines; return mismatches"""
+    rnd = random.Random(9)
+    frequencies = {word: rnd.randint(0, 1000) for word in rnd.sample(words, len(words) // 10)}
+    # Fragments from anywhere inside words, as contains mode is used
+    fragments = []
+    for prefix in queries:
+        word = rnd.choice(words)
+        start = rnd.randrange(len(word))
+        fragments.append(word[start:start + len(prefix)])
+    weights = np.array([0.5, 0.8, 0.3, 0.6], dtype=np.float32)
+
+    mismatches = 0
+    checked = 0
+    for longest_first in (True, False):
+        for lookahead in (False, True):
+            index = PrefixIndex(words)
+            strategy = LastLetterStrategy(index)
+            engine = SimpleNamespace(complete=lambda p, lf, ml, s=strategy, la=lookahead: s.complete(p, lf, ml, la))
+            expected, _ = run_queries(ReferenceStrategy(words, lookahead), queries, longest_first, min_length)
+            actual, _ = run_queries(engine, queries, longest_first, min_length)
+            mismatches += compare(f"strategy longest={longest_first} lookahead={lookahead}",
+                                  queries, expected, actual, mismatches)
+            checked += len(queries)
+
+        index = PrefixIndex(words)
+        infix = InfixIndex(index.words)
+        engine = SimpleNamespace(complete=lambda f, lf, ml, i=infix, p=index.played: i.complete(f, p, lf, ml))
+        expected, _ = run_queries(ReferenceInfix(words), fragments, longest_first, min_length)
+        actual, _ = run_queries(engine, fragments, longest_first, min_length)
+        mismatches += compare(f"contains longest={longest_first}", fragments, expected, actual, mismatches)
+        checked += len(fragments)
+
+        index = PrefixIndex(words)
+        infix = InfixIndex(index.words)
+        strategy = LastLetterStrategy(index)
+        engine = SimpleNamespace(complete=lambda f, lf, ml, i=infix, p=index.played, s=strategy: i.complete(
+            f, p, lf, ml, lambda ids, count: s.ranked(ids, lf, True)[:count]))
+        expected, _ = run_queries(ReferenceInfixStrategy(words, True), fragments, longest_first, min_length)
+        actual, _ = run_queries(engine, fragments, longest_first, min_length)
+        mismatches += compare(f"contains strategy longest={longest_first}", fragments, expected, actual, mismatches)
+        checked += len(fragments)
+
+    # The length weight's sign takes the place of longest_first
+    index = PrefixIndex(words)
+    scorer = WordScorer(index, frequencies)
+    engine = SimpleNamespace(complete=lambda p, lf, ml: scorer.complete(p, weights, ml))
+    expected, _ = run_queries(ReferenceScorer(words, weights @ scorer.features), queries, True, min_length)
+    actual, _ = run_queries(engine, queries, True, min_length)
+    mismatches += compare("scoring", queries, expected, actual, mismatches)
+    checked += len(queries)
+
+    index = PrefixIndex(words)
+    infix = InfixIndex(index.words)
+    scorer = WordScorer(index, frequencies)
+    engine = SimpleNamespace(complete=lambda f, lf, ml: infix.complete(
+        f, index.played, lf, ml, lambda ids, count: scorer.rank_ids(ids, weights, count)))
+    expected, _ = run_queries(ReferenceInfixScorer(words, weights @ scorer.features), fragments, True, min_length)
+    actual, _ = run_queries(engine, fragments, True, min_length)
+    mismatches += compare("contains scoring", fragments, expected, actual, mismatches)
+    checked += len(fragments)
+
+    status = "OK" if not mismatches else f"{mismatches} MISMATCHES"
+    print(f"Equivalence of strategy, scoring and contains engines: {checked:,} picks compared - {status}")
+    return mismatches
+
+
+def check_equivalence(size, query_count):
+    """Compare every engine's picks against LegacyCompleter and the references; return mismatches"""
+    words = generate_words(size, seed=7)
+    # The legacy index stops at four characters, so longer prefixes never matched
+    queries = [q for q in generate_workload(words, query_count, seed=8) if len(q) <= 4]
+    mismatches = 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_path = os.path.join(workdir, 'words.json')
+        bin_path = os.path.join(workdir, 'words.bin')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(words, f)
+        compile_dictionary(json_path, bin_path)
+        compiled = CompiledDictionary(bin_path)
+
+        for longest_first in (True, False):
+            for min_length in (3, 4, 6):
+                legacy = LegacyCompleter(words, min_length)
+                expected, _ = run_queries(legacy, queries, longest_first, min_length)
+                for name, engine in (('packed', PrefixIndex(words)), ('compiled', PrefixIndex(compiled))):
+                    actual, _ = run_queries(engine, queries, longest_first, min_length)
+                    mismatches += compare(f"{name} longest={longest_first} min={min_length}",
+                                          queries, expected, actual, mismatches)
+        compiled.close()
+
+    checked = len(queries) * 2 * 3 * 2
+    status = "OK" if not mismatches else f"{mismatches} MISMATCHES"
+    print(f"Equivalence vs legacy prefix dict (current played-word rules) on {size:,} words: "
+          f"{checked:,} picks compared - {status}")
+    return mismatches + check_newer_engines(words, queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word engine benchmark and equivalence check")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated dictionary sizes")
+    parser.add_argument('--queries', type=int, default=5000, help="queries per size")
+    parser.add_argument('--legacy-limit', type=int, default=300000,
+                        help="largest size to run the slow legacy engine on")
+    parser.add_argument('--check-size', type=int, default=20000,
+                        help="dictionary size for the equivalence check (0 to skip)")
+    parser.add_argument('--check-only', action='store_true', help="only run the equivalence check")
+    args = parser.parse_args()
+
+    mismatches = 0
+    if args.check_size:
+        mismatches = check_equivalence(args.check_size, args.queries // 5 or 1)
+    if not args.check_only:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in (int(s) for s in args.sizes.split(',') if s):
+                bench_size(size, args.queries, args.legacy_limit, workdir)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
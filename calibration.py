@@ -0,0 +1,165 @@
+import random
+import string
+import threading
+import time
+
+from keystrokes import send_edit
+
+# (lowest, highest, step) for each delay the app waits on, in seconds
+DELAY_RANGES = {
+    'typing_delay': (0.0, 1.0, 0.01),
+    'backspace_delay': (0.0, 1.0, 0.01),
+    'after_delete_delay': (0.0, 2.0, 0.05),
+    'start_delay': (0.0, 2.0, 0.05)
+}
+
+
+def trial_edit(rnd, keep=2, delete=3, add=8):
+    """A random (on_screen, target) pair needing both backspaces and typing"""
+    start = ''.join(rnd.choices(string.ascii_lowercase, k=keep))
+    on_screen = start + ''.join(rnd.choices(string.ascii_lowercase, k=delete))
+    # The first new letter differs, so exactly delete backspaces are needed
+    first = rnd.choice([c for c in string.ascii_lowercase if c != on_screen[keep]])
+    return on_screen, start + first + ''.join(rnd.choices(string.ascii_lowercase, k=add - 1))
+
+
+class Calibrator:
+    """Finds the fastest delays that still type reliably.
+
+    A verifier owns a text field: prepare(text) fills it, read() returns
+    what it holds after a trial. Each delay is binary-searched in turn,
+    the others held at their current values; a value counts as safe only
+    if every one of trials edits lands intact. The result is padded by
+    margin so the delays sit above the edge that was found.
+    """
+
+    def __init__(self, backend, verifier, trials=5, margin=1.25, seed=None):
+        self.backend = backend
+        self.verifier = verifier
+        self.trials = trials
+        self.margin = margin
+        self.rnd = random.Random(seed)
+        self.cancelled = threading.Event()
+
+    def reliable(self, delays):
+        """Whether every trial edit typed with delays arrives intact"""
+        for _ in range(self.trials):
+            if self.cancelled.is_set():
+                return False
+            on_screen, target = trial_edit(self.rnd)
+            self.verifier.prepare(on_screen)
+            send_edit(self.backend, on_screen, target, delays)
+            if self.verifier.read() != target:
+                return False
+        return True
+
+    def search(self, key, delays):
+        """Smallest safe value of one delay, others fixed; None if none is safe"""
+        low, high, step = DELAY_RANGES[key]
+        delays = dict(delays)
+        if not self.reliable(dict(delays, **{key: high})):
+            return None
+        # Invariant: high is safe, low is not known to be
+        while high - low > step and not self.cancelled.is_set():
+            mid = round((low + high) / 2 / step) * step
+            if mid in (low, high):
+                break
+            delays[key] = mid
+            if self.reliable(delays):
+                high = mid
+            else:
+                low = mid
+        if self.reliable(dict(delays, **{key: low})):
+            high = low
+        return round(min(DELAY_RANGES[key][1], round(high * self.margin / step) * step), 3)
+
+    def run(self, delays, progress=None):
+        """Return calibrated delays, leaving any that found no safe value as they were"""
+        delays = dict(delays)
+        for key in DELAY_RANGES:
+            if self.cancelled.is_set():
+                break
+            value = self.search(key, delays)
+            if value is not None:
+                delays[key] = value
+            if progress:
+                progress(key, value)
+        return delays
+
+
+class SpeedGovernor:
+    """Adjusts delays at runtime from reports of dropped keystrokes.
+
+    A drop backs every delay off by a factor and raises its floor, since
+    the floor just proved too fast; a run of clean completions creeps back
+    toward the floor. Floors start at the calibrated delays, or at each
+    range's lowest value when there was no calibration.
+    """
+
+    def __init__(self, settings, floors=None, backoff=1.5, recover=0.9, streak=10):
+        self.settings = settings
+        self.floors = {key: floors[key] if floors else low for key, (low, _, _) in DELAY_RANGES.items()}
+        self.backoff = backoff
+        self.recover = recover
+        self.streak = streak
+        self.clean = 0
+
+    def report(self, ok):
+        """Record one completion's outcome; return True if delays changed"""
+        if not ok:
+            self.clean = 0
+            for key, (low, high, step) in DELAY_RANGES.items():
+                self.floors[key] = round(min(high, max(self.floors[key] * 1.1, self.floors[key] + step)), 3)
+                self.settings[key] = round(min(high, max(self.settings[key] * self.backoff, self.floors[key])), 3)
+            return True
+
+        self.clean += 1
+        if self.clean < self.streak:
+            return False
+        self.clean = 0
+        changed = False
+        for key in DELAY_RANGES:
+            value = round(max(self.floors[key], self.settings[key] * self.recover), 3)
+            changed |= value != self.settings[key]
+            self.settings[key] = value
+        return changed
+
+
+class EntryVerifier:
+    """Verifier backed by a Tk entry, driven from a worker thread.
+
+    Widget calls are marshalled onto the Tk thread with after(); settle is
+    how long to wait for the last keystrokes to arrive before reading.
+    """
+
+    def __init__(self, root, entry, settle=0.15):
+        self.root = root
+        self.entry = entry
+        self.settle = settle
+
+    def on_tk_thread(self, func):
+        """Run func on the Tk thread and return its result"""
+        done = threading.Event()
+        result = []
+
+        def call():
+            try:
+                result.append(func())
+            finally:
+                done.set()
+
+        self.root.after(0, call)
+        done.wait(2.0)
+        return result[0] if result else None
+
+    def prepare(self, text):
+        def fill():
+            self.entry.delete(0, 'end')
+            self.entry.insert(0, text)
+            self.entry.icursor('end')
+            self.entry.focus_force()
+        self.on_tk_thread(fill)
+
+    def read(self):
+        time.sleep(self.settle)
+        return self.on_tk_thread(self.entry.get)
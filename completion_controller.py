@@ -0,0 +1,363 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from completion_worker import CompletionWorker
+from infix import InfixIndex
+from input_trace import KEY_DOWN, KEY_UP, edit_buffer
+from keystrokes import plan_edit, send_edit
+from speculation import Speculator
+from word_index import PrefixIndex
+
+# Words speculated per buffer, so a few can be played by others meanwhile
+SPECULATION_DEPTH = 4
+
+
+def no_log(msg, color):
+    pass
+
+
+class CompletionController:
+    """The keyboard-to-completion path, without Tk or keyboard hooks.
+
+    Keys go in through key_event(); the controller keeps the typed buffer,
+    speculates completions while the user types and types the chosen word
+    through backend() on a CompletionWorker when INSERT is pressed. The
+    engines (word_index, strategy, scorer, fuzzy) are set by the owner as
+    the dictionary loads; settings is the app's live settings dict.
+
+    completion_lock is held for a whole completion, typing included.
+    played_lock guards the match's played words and the engine cursors
+    that follow them; it is held only for single lookups, marks and
+    resets, so the OCR and Tk threads never wait for typing. Whoever
+    swaps engines takes completion_lock and then played_lock.
+
+    Callbacks, all optional and called from any thread: log(msg, color),
+    on_buffer() after every buffer change, on_completion(prefix, word,
+    speculated) after each finished completion (word None when nothing
+    matched), on_infix() when the contains-mode index gets built, and
+    on_queue() whenever the completion queue changes.
+    """
+
+    def __init__(self, settings, backend, log=None, on_buffer=None, on_completion=None,
+                 on_infix=None, on_queue=None, echo_wait=0.05):
+        self.settings = settings
+        self.backend = backend
+        self.log = log or no_log
+        self.on_buffer = on_buffer
+        self.on_completion = on_completion
+        self.on_infix = on_infix
+        # How long typing keeps expecting echoes still on their way
+        self.echo_wait = echo_wait
+
+        self.listening = False
+        self.recorder = None
+        self.current_buffer = ""
+        self.completion_lock = threading.Lock()
+        self.played_lock = threading.RLock()
+        # The keys we type come back through the hook; this many of each
+        # (name, event type) are ignored, so the user's own keys still count
+        self.echoes = Counter()
+        self.echo_lock = threading.Lock()
+        # Set while every key is ours, e.g. during calibration
+        self.injecting = False
+
+        # Words load in the background; completions use the partial index meanwhile
+        self.remote = False
+        self.word_index = PrefixIndex([])
+        self.strategy = None
+        self.scorer = None
+        self.fuzzy = None
+        self.infix = None
+        self.index_ready = False
+
+        # Completions for the buffer are worked out while the user types
+        self.speculator = Speculator()
+
+        # Every trigger (INSERT, button, OCR) queues on one typing thread
+        self.worker = CompletionWorker(self.trigger_completion, listener=on_queue)
+
+    def key_event(self, name, event_type):
+        """Apply one key event seen by the keyboard hook"""
+        if self.injecting or self.is_echo(name, event_type):
+            # Our own keystrokes, never buffered
+            return
+        if not self.listening or not name:
+            return
+        if self.recorder:
+            self.recorder.record(name, event_type)
+        if event_type != KEY_DOWN:
+            return
+
+        if name == 'insert':
+            self.log("⌨️ INSERT pressed", "#f0883e")
+            self.request_completion()
+            return
+        buffer = edit_buffer(self.current_buffer, name)
+        if buffer == self.current_buffer:
+            return
+        if name in ('space', 'enter'):
+            self.log(f"⟲ Buffer reset", "#6e7681")
+        self.set_buffer(buffer)
+        if len(name) == 1:
+            self.log(f"+ '{name}' → '{self.current_buffer}'", "#58a6ff")
+
+    def expect_echoes(self, backspaces, text):
+        """Register the key events typing backspaces and text will echo"""
+        with self.echo_lock:
+            for name in ['backspace'] * backspaces + ['space' if char == ' ' else char for char in text]:
+                self.echoes[name, KEY_DOWN] += 1
+                self.echoes[name, KEY_UP] += 1
+
+    def is_echo(self, name, event_type):
+        """Whether a key event is one of ours coming back; each echo counts once"""
+        with self.echo_lock:
+            key = (name, event_type)
+            if self.echoes[key] > 0:
+                self.echoes[key] -= 1
+                return True
+        return False
+
+    def set_buffer(self, text):
+        """Replace the typed buffer, e.g. with letters read by OCR"""
+        self.current_buffer = text
+        self.buffer_changed()
+
+    def buffer_changed(self):
+        """Report the new buffer, stop typing for the old one, and speculate"""
+        if self.on_buffer:
+            self.on_buffer()
+        self.worker.cancel()
+        self.speculate()
+
+    def request_completion(self):
+        """Queue a completion of the current buffer on the completion worker"""
+        if not self.worker.submit(self.current_buffer):
+            self.log("⏭ Already completing this buffer", "#6e7681")
+
+    def mark_played(self, word):
+        """Record a word played by anyone this match"""
+        try:
+            with self.played_lock:
+                return self.word_index.mark_played_word(word)
+        except (OSError, RuntimeError):
+            return False
+
+    def reset_played(self):
+        """Forget every word played this match; raises on a server error"""
+        with self.played_lock:
+            self.word_index.reset()
+
+    def scoring_weights(self):
+        """WordScorer weights, or None when ranking is by length alone"""
+        extra = [
+            self.settings['weight_last_rarity'],
+            self.settings['weight_difficulty'],
+            self.settings['weight_frequency']
+        ]
+        if not any(extra):
+            return None
+        # The length slider becomes a signed weight: SHORTEST -1 ... LONGEST +1
+        length = (self.settings['prefer_longer_words'] - 0.5) * 2
+        return np.array([length] + extra, dtype=np.float32)
+
+    def find_completion(self, prefix):
+        """Find completion - prefers longer words"""
+        if not prefix:
+            return None
+
+        prefix = prefix.lower()
+
+        # Candidates come pre-sorted by length; the cursor skips used words
+        longest_first = self.settings['prefer_longer_words'] > 0.5
+        min_length = self.settings['min_word_length']
+        try:
+            with self.played_lock:
+                word, cycled = self.pick(prefix, longest_first, min_length)
+        except (OSError, RuntimeError) as e:
+            self.log(f"✗ Completion server error: {str(e)}", "#f85149")
+            return None
+
+        if cycled:
+            self.log(f"↻ Cycled through all words for '{prefix}'", "#f0883e")
+        return word
+
+    def pick(self, prefix, longest_first, min_length):
+        """(completion, cycled) from the engine the settings select; call under played_lock"""
+        if self.settings['search_mode']:
+            return self.find_containing(prefix, longest_first, min_length)
+        elif self.settings['strategy_mode'] and self.strategy:
+            return self.strategy.complete(
+                prefix, longest_first, min_length, bool(self.settings['strategy_lookahead']))
+        elif self.scorer and self.scoring_weights() is not None:
+            return self.scorer.complete(prefix, self.scoring_weights(), min_length)
+        return self.word_index.complete(prefix, longest_first, min_length)
+
+    def find_containing(self, fragment, longest_first, min_length):
+        """Contains-mode lookup, from the server or the local n-gram index"""
+        if self.remote:
+            return self.word_index.contains(fragment, longest_first, min_length)
+        if not self.index_ready:
+            return None, False
+        return self.infix_index().complete(fragment, self.word_index.played, longest_first, min_length,
+                                           self.contains_ranking(longest_first))
+
+    def contains_ranking(self, longest_first):
+        """Contains mode's rank(ids, count) under Strategy Mode or Scoring Weights, else None"""
+        if self.settings['strategy_mode'] and self.strategy:
+            strategy, lookahead = self.strategy, bool(self.settings['strategy_lookahead'])
+            return lambda ids, count: strategy.ranked(ids, longest_first, lookahead)[:count]
+        weights = self.scoring_weights()
+        if self.scorer and weights is not None:
+            scorer = self.scorer
+            return lambda ids, count: scorer.rank_ids(ids, weights, count)
+        return None
+
+    def infix_index(self):
+        """Return the contains-mode n-gram index, built on first use; call under played_lock"""
+        if self.infix is None:
+            self.infix = InfixIndex(self.word_index.words)
+            if self.on_infix:
+                self.on_infix()
+        return self.infix
+
+    def find_fuzzy_completion(self, prefix):
+        """Retry a prefix with no completion as its nearest real-word prefixes"""
+        for edits, corrected in self.fuzzy.corrections(prefix.lower(), self.settings['fuzzy_edits']):
+            completion = self.find_completion(corrected)
+            if completion:
+                self.log(f"≈ Read '{prefix}' as '{corrected}' ({edits:g} edits)", "#f0883e")
+                return corrected, completion
+        return prefix, None
+
+    def completion_key(self, prefix):
+        """Everything find_completion's answer depends on, besides played words"""
+        weights = self.scoring_weights()
+        return (
+            prefix,
+            self.settings['search_mode'],
+            self.settings['strategy_mode'],
+            self.settings['strategy_lookahead'],
+            None if weights is None else tuple(weights.tolist()),
+            self.settings['prefer_longer_words'] > 0.5,
+            self.settings['min_word_length'],
+            id(self.word_index)
+        )
+
+    def played_version(self):
+        """Changes whenever a speculated ranking may no longer hold.
+
+        Marking more words only removes candidates, so the first unplayed
+        word of a ranking stays the best pick - except in strategy mode,
+        where opponents' remaining replies depend on what is played.
+        """
+        played = self.word_index.played
+        if self.settings['strategy_mode']:
+            return played.generation, played.count
+        return played.generation
+
+    def speculate(self):
+        """Replace any pending speculation with one for the current buffer"""
+        prefix = self.current_buffer.lower()
+        # The server answers over the network and owns its played words
+        if not prefix or not self.index_ready or self.remote:
+            self.speculator.cancel()
+            return
+        self.speculator.request(self.completion_key(prefix), lambda: self.peek_completions(prefix))
+
+    def peek_completions(self, prefix):
+        """Return (played version, next few words find_completion would pick)"""
+        longest_first = self.settings['prefer_longer_words'] > 0.5
+        min_length = self.settings['min_word_length']
+        with self.played_lock:
+            version = self.played_version()
+            if self.settings['search_mode']:
+                if not self.index_ready:
+                    return None
+                words = self.infix_index().peek(prefix, self.word_index.played, longest_first, min_length,
+                                                SPECULATION_DEPTH, self.contains_ranking(longest_first))
+            elif self.settings['strategy_mode'] and self.strategy:
+                words = self.strategy.peek(prefix, longest_first, min_length,
+                                           bool(self.settings['strategy_lookahead']), SPECULATION_DEPTH)
+            elif self.scorer and self.scoring_weights() is not None:
+                words = self.scorer.peek(prefix, self.scoring_weights(), min_length, SPECULATION_DEPTH)
+            else:
+                words = self.word_index.peek(prefix, longest_first, min_length, SPECULATION_DEPTH)
+        return version, words
+
+    def take_speculation(self, prefix):
+        """Claim the precomputed completion for prefix, or None if it went stale"""
+        if self.remote:
+            return None
+        speculated = self.speculator.take(self.completion_key(prefix.lower()))
+        with self.played_lock:
+            if speculated is None or speculated[0] != self.played_version():
+                return None
+            for word in speculated[1]:
+                # An alternative steps in when a better word was played meanwhile
+                if self.mark_played(word):
+                    return word
+        return None
+
+    def trigger_completion(self, prefix, cancelled):
+        """Complete prefix, the buffer when triggered; runs on the completion worker"""
+        with self.completion_lock:
+            if not prefix:
+                self.log("⚠ No prefix", "#f85149")
+                return
+            if prefix != self.current_buffer:
+                self.log(f"⏭ Buffer changed since '{prefix}' was triggered", "#6e7681")
+                return
+
+            completion = self.take_speculation(prefix)
+            speculated = completion is not None
+            if speculated:
+                self.log(f"⚡ '{completion}' was ready", "#6e7681")
+            else:
+                completion = self.find_completion(prefix)
+            if not completion and not self.settings['search_mode'] and self.fuzzy and self.settings['fuzzy_edits']:
+                # The misread letters are still on screen, so the edit starts from prefix
+                corrected, completion = self.find_fuzzy_completion(prefix)
+
+            if completion:
+                # Only the letters after the shared start are deleted and retyped;
+                # a contains-mode word that starts elsewhere replaces them all
+                backspaces, remaining = plan_edit(prefix, completion)
+
+                try:
+                    backend = self.backend()
+                    if backspaces:
+                        self.log(f"← Deleting {backspaces}...", "#f0883e")
+                    self.log(f"→ Typing '{remaining}'...", "#58a6ff")
+                    if backend.echoes:
+                        self.expect_echoes(backspaces, remaining)
+                    try:
+                        deleted, typed = send_edit(backend, prefix, completion, self.settings,
+                                                   bool(self.settings['batch_typing']), cancelled)
+                        if self.echo_wait:
+                            time.sleep(self.echo_wait)
+                    finally:
+                        # Echoes of keys never sent, or lost, must not swallow the user's
+                        with self.echo_lock:
+                            self.echoes.clear()
+                    if (deleted, typed) != (backspaces, remaining):
+                        self.log(f"⏹ Stopped typing '{completion}' - buffer changed", "#f0883e")
+                        return
+
+                    self.log(f"✓ '{prefix}' → '{completion}'", "#3fb950")
+                    if self.on_completion:
+                        self.on_completion(prefix, completion, speculated)
+                    # A change that landed after the last key owns the buffer now
+                    if not cancelled.is_set():
+                        self.set_buffer("")
+                except Exception as e:
+                    self.log(f"✗ Error: {str(e)}", "#f85149")
+            else:
+                if not self.index_ready:
+                    self.log(f"✗ No completion for '{prefix}' yet (dictionary loading)", "#f0883e")
+                else:
+                    self.log(f"✗ No completion for '{prefix}'", "#f85149")
+                if self.on_completion:
+                    self.on_completion(prefix, None, False)
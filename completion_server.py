@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from infix import InfixIndex
+from word_index import PrefixIndex
+from word_table import WordTable
+from word_store import format_bytes, load_word_store
+
+# Wire protocol: one JSON object per line in each direction, answered in order.
+#   {"op": "complete", "prefix": "ab", "longest_first": true, "min_length": 4}
+#   {"op": "contains", "fragment": "ab", "longest_first": true, "min_length": 4}
+#   {"op": "query", "starts_with": "s", "ends_with": "e", "min_length": 6, "max_length": 9,
+#    "include": "", "exclude": "z", "unused": true, "longest_first": true, "limit": 20}
+#   {"op": "used", "prefix": "ab"}
+#   {"op": "mark", "word": "apple"}     (played by anyone, e.g. seen via OCR)
+#   {"op": "reset", "prefix": "ab"}     (omit prefix to start a new match)
+#   {"op": "stats"}
+# Every request may carry "session"; each session has its own played words.
+DEFAULT_ADDRESS = ('127.0.0.1', 47631)
+# Requests that can be sent twice with the same outcome; complete, contains
+# and mark move the session's played words
+IDEMPOTENT_OPS = frozenset({'query', 'used', 'reset', 'stats'})
+# How long a client waits on contains, which may wait for the n-gram index build
+CONTAINS_TIMEOUT = 30.0
+
+
+def parse_address(text):
+    """Parse 'host:port', ':port' or 'unix:/path' into a socket address"""
+    if text is None:
+        return DEFAULT_ADDRESS
+    if text.startswith('unix:'):
+        return text[len('unix:'):]
+    host, _, port = text.rpartition(':')
+    return (host or DEFAULT_ADDRESS[0], int(port))
+
+
+class CompletionServer:
+    """Serves one shared word store to many local clients"""
+
+    def __init__(self, store):
+        self.store = store
+        self.sessions = {}
+        self.infix = None
+        self.infix_build = None
+        self.table = None
+        self.requests = 0
+
+    def session(self, name):
+        """Return the index holding a session's completion state"""
+        index = self.sessions.get(name)
+        if index is None:
+            # Sessions share the packed store and only differ in cursors
+            index = self.sessions[name] = PrefixIndex(self.store)
+        return index
+
+    def infix_index(self):
+        """Return the shared n-gram index, built on first use"""
+        if self.infix is None:
+            self.infix = InfixIndex(self.store)
+        return self.infix
+
+    def start_infix_build(self):
+        """Build the n-gram index on a worker thread, off the event loop"""
+        if self.infix is None and self.infix_build is None:
+            self.infix_build = asyncio.get_running_loop().run_in_executor(None, InfixIndex, self.store)
+
+    async def infix_ready(self):
+        """Wait until the n-gram index is built, without holding up other clients"""
+        self.start_infix_build()
+        if self.infix is None:
+            self.infix = await self.infix_build
+
+    def word_table(self):
+        """Return the shared columnar word table, built on first use"""
+        if self.table is None:
+            self.table = WordTable(self.store)
+        return self.table
+
+    def handle(self, request):
+        """Answer one decoded request"""
+        self.requests += 1
+        op = request.get('op')
+        index = self.session(str(request.get('session', 'default')))
+
+        if op == 'complete':
+            word, cycled = index.complete(
+                str(request['prefix']).lower(),
+                bool(request.get('longest_first', True)),
+                int(request.get('min_length', 1))
+            )
+            return {'ok': True, 'word': word, 'cycled': cycled}
+        elif op == 'contains':
+            word, cycled = self.infix_index().complete(
+                str(request['fragment']).lower(),
+                index.played,
+                bool(request.get('longest_first', True)),
+                int(request.get('min_length', 1))
+            )
+            return {'ok': True, 'word': word, 'cycled': cycled}
+        elif op == 'query':
+            max_length = request.get('max_length')
+            limit = request.get('limit', 100)
+            words = self.word_table().query(
+                str(request.get('starts_with', '')),
+                str(request.get('ends_with', '')),
+                int(request.get('min_length', 1)),
+                int(max_length) if max_length is not None else None,
+                str(request.get('include', '')),
+                str(request.get('exclude', '')),
+                index.played if request.get('unused', True) else None,
+                bool(request.get('longest_first', True)),
+                int(limit) if limit is not None else None
+            )
+            return {'ok': True, 'words': words}
+        elif op == 'used':
+            return {'ok': True, 'words': index.used(str(request['prefix']).lower())}
+        elif op == 'mark':
+            return {'ok': True, 'marked': index.mark_played_word(str(request['word']).lower())}
+        elif op == 'reset':
+            prefix = request.get('prefix')
+            index.reset(str(prefix).lower() if prefix is not None else None)
+            return {'ok': True}
+        elif op == 'stats':
+            memory = index.memory_usage()
+            memory['infix'] = self.infix.memory_usage() if self.infix else 0
+            return {
+                'ok': True,
+                'words': len(index),
+                'nodes': index.node_count,
+                'memory': memory,
+                'played': len(index.played),
+                'sessions': len(self.sessions),
+                'requests': self.requests
+            }
+        return {'ok': False, 'error': f"Unknown op {op!r}"}
+
+    async def serve_client(self, reader, writer):
+        """Answer requests from one connection until it closes"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get('op') == 'contains':
+                        await self.infix_ready()
+                    response = self.handle(request)
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        """Listen on a TCP (host, port) or Unix socket path forever"""
+        # Takes seconds on a large dictionary; started now so contains is ready sooner
+        self.start_infix_build()
+        if isinstance(address, str):
+            server = await asyncio.start_unix_server(self.serve_client, path=address)
+        else:
+            server = await asyncio.start_server(self.serve_client, *address)
+        async with server:
+            await server.serve_forever()
+
+
+class CompletionClient:
+    """Blocking, thread-safe client for CompletionServer.
+
+    Mirrors the PrefixIndex calls the app uses, so it can stand in for a
+    local index.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, session='default', timeout=2.0):
+        self.address = address
+        self.session = session
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+        self.node_count = 0
+        self.word_count = 0
+        self.sent = False
+
+    def connect(self):
+        """Open the connection"""
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        else:
+            sock = socket.create_connection(self.address, self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile('rb')
+
+    def close(self):
+        """Close the connection"""
+        if self.sock:
+            self.reader.close()
+            self.sock.close()
+        self.sock = None
+        self.reader = None
+
+    def exchange(self, payload, timeout=None):
+        """Send one request line and read its response line; sent tells how far it got"""
+        self.sent = False
+        if self.sock is None:
+            self.connect()
+        self.sock.settimeout(timeout or self.timeout)
+        self.sock.sendall(payload)
+        self.sent = True
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Completion server closed the connection")
+        return line
+
+    def request(self, op, timeout=None, **fields):
+        """Send a request and return the decoded response; timeout overrides the default"""
+        fields['op'] = op
+        fields['session'] = self.session
+        payload = json.dumps(fields).encode('utf-8') + b'\n'
+        with self.lock:
+            try:
+                line = self.exchange(payload, timeout)
+            except OSError:
+                self.close()
+                # The server may have restarted; retry once on a fresh connection,
+                # unless the server may already have applied a request that changes state
+                if self.sent and op not in IDEMPOTENT_OPS:
+                    raise
+                try:
+                    line = self.exchange(payload, timeout)
+                except OSError:
+                    self.close()
+                    raise
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'Completion server error'))
+        return response
+
+    def __len__(self):
+        return self.word_count
+
+    def complete(self, prefix, longest_first=True, min_length=1):
+        """Return (next completion or None, whether the rotation wrapped)"""
+        response = self.request('complete', prefix=prefix,
+                                longest_first=longest_first, min_length=min_length)
+        return response['word'], response['cycled']
+
+    def contains(self, fragment, longest_first=True, min_length=1):
+        """Return (next word containing fragment or None, whether candidates cycled)"""
+        response = self.request('contains', timeout=CONTAINS_TIMEOUT, fragment=fragment,
+                                longest_first=longest_first, min_length=min_length)
+        return response['word'], response['cycled']
+
+    def query(self, **constraints):
+        """Return words matching WordTable.query-style constraints"""
+        return self.request('query', **constraints)['words']
+
+    def used(self, prefix):
+        """Return the played completions of prefix"""
+        return self.request('used', prefix=prefix)['words']
+
+    def mark_played_word(self, word):
+        """Mark a word played this match (ours or an opponent's)"""
+        return self.request('mark', word=word)['marked']
+
+    def reset(self, prefix=None):
+        """Release played words of prefix, or of the whole match"""
+        self.request('reset', prefix=prefix)
+
+    def stats(self):
+        """Fetch server statistics and cache the dictionary size"""
+        stats = self.request('stats')
+        self.word_count = stats['words']
+        self.node_count = stats['nodes']
+        return stats
+
+    def memory_usage(self):
+        """Return the server's {'store', 'mapped', 'ranked'} byte counts"""
+        return self.stats()['memory']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared word completion server")
+    parser.add_argument('dictionary', nargs='?', default=None,
+                        help="words.bin or words.json (default: whichever exists)")
+    parser.add_argument('--listen', default=None, metavar='ADDRESS',
+                        help="host:port or unix:/path (default: 127.0.0.1:47631)")
+    args = parser.parse_args()
+
+    path = args.dictionary or ('words.bin' if os.path.exists('words.bin') else 'words.json')
+    store = load_word_store(path)
+    server = CompletionServer(store)
+    address = parse_address(args.listen)
+    heap, mapped = store.memory_usage()
+    print(f"Serving {len(store)} words from {path} "
+          f"({format_bytes(heap + mapped)}) on {address}")
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
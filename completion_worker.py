@@ -0,0 +1,125 @@
+import collections
+import threading
+import time
+import traceback
+
+
+class CompletionWorker:
+    """Runs completion jobs one at a time on a dedicated thread.
+
+    submit(key) queues a job for handler(key, cancelled). A key that is
+    already queued or running is coalesced into that job, so a trigger that
+    fires twice types one word. At most capacity jobs wait; when full the
+    oldest is dropped. cancel() drops queued jobs and sets the running job's
+    cancelled event, which the handler checks between keystrokes.
+    listener, if given, is called after every submit and finished job.
+    """
+
+    def __init__(self, handler, capacity=4, listener=None, history=100):
+        self.handler = handler
+        self.capacity = capacity
+        self.listener = listener
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.idle = threading.Condition(self.lock)
+        self.queue = collections.deque()
+        self.running = None
+        self.cancelled = threading.Event()
+        self.waits = collections.deque(maxlen=history)
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.interrupted = 0
+        self.completed = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, key):
+        """Queue a job for key; return False if it joined an existing one"""
+        with self.lock:
+            self.submitted += 1
+            duplicate = key == self.running and not self.cancelled.is_set()
+            duplicate = duplicate or any(queued == key for queued, _ in self.queue)
+            if duplicate:
+                self.coalesced += 1
+            else:
+                if len(self.queue) >= self.capacity:
+                    self.queue.popleft()
+                    self.dropped += 1
+                self.queue.append((key, time.perf_counter()))
+                self.wakeup.notify()
+        self.notify()
+        return not duplicate
+
+    def cancel(self):
+        """Drop queued jobs and stop the running one at its next keystroke.
+
+        A job that changes the state itself (the worker thread calling) is
+        not cancelled by it.
+        """
+        if threading.current_thread() is self.thread:
+            return
+        with self.lock:
+            self.dropped += len(self.queue)
+            self.queue.clear()
+            if self.running is not None:
+                self.cancelled.set()
+            self.idle.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until no job is queued or running; return False on timeout"""
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.queue and self.running is None, timeout)
+
+    def depth(self):
+        """Jobs waiting, not counting the running one"""
+        return len(self.queue)
+
+    def stats(self):
+        """Queue depth, counters, and wait times (seconds) before jobs started"""
+        with self.lock:
+            waits = sorted(self.waits)
+            return {
+                'depth': len(self.queue),
+                'running': self.running is not None,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'interrupted': self.interrupted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'wait_p50': waits[len(waits) // 2] if waits else 0.0,
+                'wait_max': waits[-1] if waits else 0.0
+            }
+
+    def notify(self):
+        if self.listener:
+            self.listener()
+
+    def run(self):
+        while True:
+            with self.lock:
+                while not self.queue:
+                    self.wakeup.wait()
+                key, submitted = self.queue.popleft()
+                self.waits.append(time.perf_counter() - submitted)
+                self.running = key
+                self.cancelled = cancelled = threading.Event()
+            try:
+                self.handler(key, cancelled)
+            except Exception:
+                traceback.print_exc()
+                failed = True
+            else:
+                failed = False
+            with self.lock:
+                self.running = None
+                if failed:
+                    self.failed += 1
+                elif cancelled.is_set():
+                    self.interrupted += 1
+                else:
+                    self.completed += 1
+                self.idle.notify_all()
+            self.notify()
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Letter pairs Tesseract mixes up on game tiles, and what swapping them costs in
+# edits. Any other substitution, a dropped letter or a spurious one costs 1.
+OCR_CONFUSIONS = {
+    ('o', 'q'): 0.3, ('o', 'd'): 0.4, ('o', 'c'): 0.5, ('o', 'u'): 0.6, ('c', 'g'): 0.5,
+    ('i', 'l'): 0.3, ('i', 'j'): 0.4, ('i', 't'): 0.5, ('l', 't'): 0.6, ('i', 'y'): 0.7,
+    ('e', 'f'): 0.4, ('p', 'r'): 0.5, ('b', 'r'): 0.6, ('b', 'e'): 0.7, ('p', 'f'): 0.7,
+    ('u', 'v'): 0.4, ('v', 'y'): 0.5, ('m', 'n'): 0.5, ('n', 'h'): 0.6, ('h', 'k'): 0.7,
+    ('k', 'x'): 0.6, ('s', 'z'): 0.7, ('w', 'v'): 0.6
+}
+# Costs are held as int16 tenths of an edit, which halves the DP's memory traffic
+EDIT_COST = 10
+
+
+def substitution_costs(confusions=OCR_CONFUSIONS):
+    """256x256 table: cost of reading byte i when the tile showed byte j"""
+    costs = np.full((256, 256), EDIT_COST, dtype=np.int16)
+    np.fill_diagonal(costs, 0)
+    for (a, b), cost in confusions.items():
+        costs[ord(a), ord(b)] = costs[ord(b), ord(a)] = round(cost * EDIT_COST)
+    return costs
+
+
+class FuzzyMatcher:
+    """Error-tolerant prefix lookup over a PrefixIndex.
+
+    Runs a weighted Levenshtein automaton over the index's implicit trie one
+    depth at a time: every live trie node carries one row of the edit-distance
+    table, all rows at a depth advance together as NumPy arrays, and a node is
+    dropped as soon as every cell of its row exceeds the budget.
+
+    In sorted order a depth-d node starts wherever a word of at least d bytes
+    shares fewer than d bytes with the word before it, so the trie levels come
+    from a single common-prefix-length array. Distances are over UTF-8 bytes.
+    """
+
+    def __init__(self, index, costs=None):
+        self.index = index
+        self.costs = substitution_costs() if costs is None else costs
+        store = index.words
+        self.blob = np.frombuffer(store.blob, dtype=np.uint8)
+        self.offsets = np.frombuffer(store.offsets, dtype=np.uint32).astype(np.int64)
+        self.lengths = np.frombuffer(store.lengths, dtype=np.uint8)
+        self.common = self.common_prefix_lengths()
+        self.levels = {}
+
+    def common_prefix_lengths(self):
+        """Bytes each word shares with the word sorted before it"""
+        count = len(self.lengths)
+        common = np.zeros(count, dtype=np.uint8)
+        if count < 2:
+            return common
+        starts = self.offsets[:-1]
+        prev_lengths, lengths = self.lengths[:-1], self.lengths[1:]
+        # Only pairs that matched through depth d can extend to d + 1
+        live = np.arange(1, count)
+        depth = 0
+        while len(live):
+            keep = (lengths[live - 1] > depth) & (prev_lengths[live - 1] > depth)
+            live = live[keep]
+            same = self.blob[starts[live] + depth] == self.blob[starts[live - 1] + depth]
+            live = live[same]
+            common[live] += 1
+            depth += 1
+        return common
+
+    def level(self, depth):
+        """Sorted first word IDs of every trie node at depth, then the word count"""
+        starts = self.levels.get(depth)
+        if starts is None:
+            starts = np.append(np.flatnonzero((self.common < depth) & (self.lengths >= depth)),
+                               len(self.lengths))
+            self.levels[depth] = starts
+        return starts
+
+    def corrections(self, prefix, max_edits=2, limit=8):
+        """Return up to limit (edits, dictionary prefix) pairs, cheapest first.
+
+        Each dictionary prefix starts at least one real word. The budget
+        grows one edit at a time, so a near miss never pays for a wide search.
+        """
+        read = np.frombuffer(prefix.encode('utf-8'), dtype=np.uint8)
+        # Never rewrite more of the prefix than was read correctly
+        max_edits = min(max_edits, len(read) - 1)
+        for edits in range(1, int(max_edits) + 1):
+            found = self.search(read, edits * EDIT_COST, limit)
+            if found:
+                return [(cost / EDIT_COST, node) for cost, node in found]
+        return []
+
+    def search(self, read, budget, limit):
+        """Cheapest dictionary prefixes within budget of the bytes read"""
+        n = len(read)
+        band = budget // EDIT_COST
+        sub_costs = self.costs[read]
+        found_cost, found_size, found_start, found_depth = [], [], [], []
+
+        # Root: one node spanning every word, row[j] = dropping j spurious letters.
+        # Rows are stored as columns so each DP step runs over contiguous memory.
+        starts = np.zeros(1, dtype=np.int64)
+        ends = np.array([len(self.lengths)], dtype=np.int64)
+        rows = (np.arange(n + 1, dtype=np.int16) * EDIT_COST)[:, np.newaxis]
+
+        for depth in range(1, n + band + 1):
+            level = self.level(depth)
+            # Children of each parent are the level's starts inside its range
+            first = np.searchsorted(level[:-1], starts)
+            last = np.searchsorted(level[:-1], ends)
+            counts = last - first
+            if not counts.sum():
+                break
+            parent = np.repeat(np.arange(len(starts)), counts)
+            child = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            slot = first[parent] + child
+            child_starts = level[slot]
+            child_ends = np.minimum(level[slot + 1], ends[parent])
+
+            letters = self.blob[self.offsets[child_starts] + depth - 1]
+            rows = rows[:, parent]
+            # Cells more than the budget's edits off the diagonal can never be
+            # within budget, so only the band around it is computed
+            child_rows = np.full_like(rows, budget + 1)
+            child_rows[0] = rows[0] + EDIT_COST
+            for j in range(max(1, depth - band), min(n, depth + band) + 1):
+                child_rows[j] = np.minimum(
+                    np.minimum(rows[j - 1] + sub_costs[j - 1, letters], rows[j] + EDIT_COST),
+                    child_rows[j - 1] + EDIT_COST
+                )
+
+            hits = np.flatnonzero(child_rows[n] <= budget)
+            found_cost.append(child_rows[n, hits])
+            found_size.append(child_ends[hits] - child_starts[hits])
+            found_start.append(child_starts[hits])
+            found_depth.append(np.full(len(hits), depth))
+
+            live = np.flatnonzero(child_rows.min(axis=0) <= budget)
+            starts, ends, rows = child_starts[live], child_ends[live], child_rows[:, live]
+            if not len(starts):
+                break
+
+        if not found_cost:
+            return []
+        cost = np.concatenate(found_cost)
+        size = np.concatenate(found_size)
+        start = np.concatenate(found_start)
+        depth = np.concatenate(found_depth)
+        # Cheapest first, then the prefix with the most words behind it
+        order = np.lexsort((start, -size, cost))[:limit]
+        found = []
+        for i in order:
+            offset = int(self.offsets[start[i]])
+            node = bytes(self.blob[offset:offset + int(depth[i])]).decode('utf-8', 'ignore')
+            found.append((int(cost[i]), node))
+        return found
@@ -0,0 +1,129 @@
+import numpy as np
+
+
+def gram_postings(blob, offsets, size):
+    """Return (sorted gram keys, posting offsets, word IDs) for one gram size.
+
+    Every byte position that starts a size-byte gram inside its word yields
+    one (gram, word ID) pair; duplicates within a word collapse, and each
+    gram's IDs come out ascending.
+    """
+    byte_lengths = np.diff(offsets)
+    word_ids = np.repeat(np.arange(len(byte_lengths), dtype=np.int64), byte_lengths)
+    positions = np.arange(len(word_ids), dtype=np.int64)
+    positions = positions[positions + size <= offsets[word_ids + 1]]
+
+    keys = np.zeros(len(positions), dtype=np.int64)
+    for i in range(size):
+        keys = (keys << 8) | blob[positions + i]
+    pairs = (keys << 32) | word_ids[positions]
+    pairs.sort()
+    if len(pairs):
+        pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])]
+
+    pair_keys = pairs >> 32
+    starts = np.flatnonzero(np.append(True, pair_keys[1:] != pair_keys[:-1])) if len(pairs) else pairs
+    grams = pair_keys[starts]
+    starts = np.append(starts, len(pairs)).astype(np.int64)
+    return grams, starts, (pairs & 0xFFFFFFFF).astype(np.uint32)
+
+
+class InfixIndex:
+    """Letter, bigram and trigram posting lists over a word store's IDs.
+
+    Answers "words containing this fragment" without scanning the words:
+    a fragment of up to three bytes is one posting list, a longer one is the
+    intersection of its trigrams' lists, checked against the words.
+    Completions rank and skip played words exactly as PrefixIndex does,
+    unless a rank(ids, count) function is passed, returning the best count
+    of ids best first, e.g. to rank by a strategy or by scoring weights.
+    """
+
+    GRAM_SIZES = (1, 2, 3)
+
+    def __init__(self, words):
+        self.words = words
+        self.blob = np.frombuffer(words.blob, dtype=np.uint8)
+        self.offsets = np.frombuffer(words.offsets, dtype=np.uint32).astype(np.int64)
+        self.lengths = np.frombuffer(words.lengths, dtype=np.uint8)
+        self.postings = {size: gram_postings(self.blob, self.offsets, size) for size in self.GRAM_SIZES}
+
+    def posting(self, gram):
+        """Ascending IDs of the words containing a gram of up to 3 bytes"""
+        grams, starts, ids = self.postings[len(gram)]
+        key = int.from_bytes(gram, 'big')
+        i = int(np.searchsorted(grams, key))
+        if i == len(grams) or grams[i] != key:
+            return ids[:0]
+        return ids[starts[i]:starts[i + 1]]
+
+    def matches(self, fragment):
+        """Ascending IDs of the words containing fragment"""
+        data = fragment.encode('utf-8')
+        if not data:
+            return np.arange(len(self.lengths), dtype=np.uint32)
+        if len(data) in self.GRAM_SIZES:
+            return self.posting(data)
+
+        # Shortest lists first, so the running intersection shrinks fastest
+        lists = sorted((self.posting(data[i:i + 3]) for i in range(len(data) - 2)), key=len)
+        ids = lists[0]
+        for posting in lists[1:]:
+            if not len(ids):
+                break
+            ids = np.intersect1d(ids, posting, assume_unique=True)
+        # Trigrams can all occur without the whole fragment occurring in order
+        return np.array([i for i in ids if fragment in self.words[int(i)]], dtype=np.uint32)
+
+    def used(self, fragment, played):
+        """Return the played words containing fragment"""
+        ids = self.matches(fragment)
+        return [self.words[int(i)] for i in ids[played.mask(ids)]]
+
+    def eligible(self, fragment, min_length):
+        """IDs of words containing fragment with at least min_length letters"""
+        ids = self.matches(fragment)
+        byte_lengths = self.offsets[ids + 1] - self.offsets[ids]
+        # The fragment itself would add nothing, as with a prefix
+        return ids[(self.lengths[ids] >= min_length) & (byte_lengths != len(fragment.encode('utf-8')))]
+
+    def order_keys(self, ids, longest_first):
+        """Sort keys giving prefix completion's order: by length, then by ID"""
+        lengths = self.lengths[ids].astype(np.int64)
+        return ((-lengths if longest_first else lengths) << 32) + ids
+
+    def peek(self, fragment, played, longest_first=True, min_length=1, count=1, rank=None):
+        """Return the next count words complete() would pick, leaving them unplayed"""
+        ids = self.eligible(fragment, min_length)
+        ids = ids[~played.mask(ids)]
+        if rank is not None:
+            return [self.words[int(i)] for i in rank(ids, count)]
+        keys = self.order_keys(ids, longest_first)
+        if count < len(ids):
+            top = np.argpartition(keys, count)[:count]
+            ids, keys = ids[top], keys[top]
+        return [self.words[int(i)] for i in ids[np.argsort(keys)]]
+
+    def complete(self, fragment, played, longest_first=True, min_length=1, rank=None):
+        """Return (best unplayed word containing fragment or None, whether candidates cycled)"""
+        eligible = self.eligible(fragment, min_length)
+        free = eligible[~played.mask(eligible)]
+        cycled = False
+        if not len(free):
+            if not len(eligible):
+                return None, False
+            # Every candidate was played: release this fragment's words only
+            played.clear_ids(eligible.astype(np.int64))
+            free = eligible
+            cycled = True
+
+        if rank is not None:
+            word_id = int(rank(free, 1)[0])
+        else:
+            word_id = int(free[np.argmin(self.order_keys(free, longest_first))])
+        played.mark(word_id)
+        return self.words[word_id], cycled
+
+    def memory_usage(self):
+        """Return bytes held by the posting lists"""
+        return sum(sum(array.nbytes for array in table) for table in self.postings.values())
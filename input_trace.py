@@ -0,0 +1,116 @@
+import random
+import time
+from collections import namedtuple
+
+# Same strings as keyboard.KEY_DOWN / keyboard.KEY_UP
+KEY_DOWN = 'down'
+KEY_UP = 'up'
+TRACE_HEADER = 'keytrace 1'
+
+# One key event; time is in seconds from the start of the trace
+KeyEvent = namedtuple('KeyEvent', ['time', 'name', 'event_type'])
+
+
+def edit_buffer(buffer, name):
+    """Return the typed buffer after key name goes down.
+
+    Letters append, backspace deletes one, space and enter end the word;
+    every other key leaves the buffer as it was.
+    """
+    if len(name) == 1 and name.isalpha():
+        return buffer + name.lower()
+    if name == 'backspace':
+        return buffer[:-1]
+    if name in ('space', 'enter'):
+        return ''
+    return buffer
+
+
+def write_trace(path, events):
+    """Save events as text, one "<ms since previous> <d|u> <key>" line each"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TRACE_HEADER + '\n')
+        last = 0.0
+        for event in events:
+            gap = round((event.time - last) * 1000, 1)
+            f.write(f"{gap:g} {'d' if event.event_type == KEY_DOWN else 'u'} {event.name}\n")
+            last += gap / 1000
+
+
+def read_trace(path):
+    """Load the events saved by write_trace"""
+    with open(path, encoding='utf-8') as f:
+        if f.readline().strip() != TRACE_HEADER:
+            raise ValueError(f"{path} is not a key trace")
+        events = []
+        clock = 0.0
+        for line in f:
+            gap, kind, name = line.rstrip('\n').split(' ', 2)
+            clock += float(gap) / 1000
+            events.append(KeyEvent(clock, name, KEY_DOWN if kind == 'd' else KEY_UP))
+    return events
+
+
+class TraceRecorder:
+    """Collects key events as they happen, timed from the first one"""
+
+    def __init__(self):
+        self.events = []
+        self.start = None
+
+    def record(self, name, event_type):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        self.events.append(KeyEvent(now - self.start, name, event_type))
+
+    def save(self, path):
+        write_trace(path, self.events)
+        return len(self.events)
+
+
+def synthetic_trace(words, keystrokes, seed=0, key_gap=0.12, think=0.8):
+    """A made-up session of about keystrokes key presses.
+
+    Each turn types the first one to three letters of a word, sometimes
+    with a mistyped letter and a backspace, presses INSERT, then enter to
+    submit the word, and waits for the next turn.
+    """
+    rnd = random.Random(seed)
+    events = []
+    clock = 0.0
+    presses = 0
+
+    def press(name):
+        nonlocal clock, presses
+        events.append(KeyEvent(clock, name, KEY_DOWN))
+        events.append(KeyEvent(clock + key_gap / 3, name, KEY_UP))
+        clock += key_gap * rnd.uniform(0.5, 1.5)
+        presses += 1
+
+    while presses < keystrokes:
+        word = rnd.choice(words)
+        for letter in word[:rnd.choice((1, 2, 2, 3))]:
+            if rnd.random() < 0.05:
+                press(rnd.choice('abcdefghijklmnopqrstuvwxyz'))
+                press('backspace')
+            press(letter)
+        press('insert')
+        press('enter')
+        clock += think * rnd.uniform(0.5, 2.0)
+    return events
+
+
+def replay(events, handle, speed=None):
+    """Feed events to handle(event) in order.
+
+    speed 1.0 keeps the recorded timing, 10.0 runs ten times faster, and
+    None sends each event as soon as the previous one was handled.
+    """
+    start = time.perf_counter()
+    for event in events:
+        if speed:
+            wait = start + event.time / speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        handle(event)
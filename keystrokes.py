@@ -0,0 +1,191 @@
+import os
+import time
+
+# Both are Windows-oriented and may be missing (or fail without a display)
+# on a headless machine, where only RecordingBackend is usable
+try:
+    import keyboard
+except Exception:
+    keyboard = None
+try:
+    import pyautogui
+except Exception:
+    pyautogui = None
+
+
+def plan_edit(on_screen, target):
+    """Return (backspaces, text) that turn on_screen into target.
+
+    Only what follows the common prefix is retyped. Letters compare
+    case-insensitively, since games often show tiles in capitals.
+    """
+    common = len(os.path.commonprefix([on_screen.lower(), target.lower()]))
+    return len(on_screen) - common, target[common:]
+
+
+class OutputBackend:
+    """Destination for completion keystrokes.
+
+    Backends with batch set can inject a whole run of keys in one call,
+    which send_edit uses when batching is requested. Backends with echoes
+    set inject real key events, which the keyboard hook sees as well.
+    """
+
+    name = 'base'
+    batch = False
+    echoes = True
+
+    def backspace(self, count, delay):
+        """Press backspace count times, waiting delay seconds after each"""
+        raise NotImplementedError
+
+    def type_text(self, text, delay):
+        """Type text, waiting delay seconds after each character"""
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        """Wait between keystroke phases"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class KeyboardBackend(OutputBackend):
+    """Injects keys through the keyboard module"""
+
+    name = 'keyboard'
+    batch = True
+
+    def __init__(self):
+        if keyboard is None:
+            raise RuntimeError("The keyboard module is not available")
+
+    def backspace(self, count, delay):
+        if count and delay <= 0:
+            keyboard.send(', '.join(['backspace'] * count))
+            return
+        for _ in range(count):
+            keyboard.press_and_release('backspace')
+            self.sleep(delay)
+
+    def type_text(self, text, delay):
+        if delay <= 0:
+            keyboard.write(text)
+            return
+        for char in text:
+            try:
+                keyboard.send(char)
+            except Exception:
+                # Keys without a scan code on this layout
+                if pyautogui is not None:
+                    pyautogui.press(char)
+                else:
+                    keyboard.write(char)
+            self.sleep(delay)
+
+
+class PyAutoGUIBackend(OutputBackend):
+    """Injects keys through pyautogui, for windows that ignore keyboard's events"""
+
+    name = 'pyautogui'
+    batch = True
+
+    def __init__(self):
+        if pyautogui is None:
+            raise RuntimeError("The pyautogui module is not available")
+
+    def backspace(self, count, delay):
+        if count:
+            pyautogui.press('backspace', presses=count, interval=delay, _pause=False)
+
+    def type_text(self, text, delay):
+        pyautogui.write(text, interval=delay, _pause=False)
+
+
+class RecordingBackend(OutputBackend):
+    """Applies keystrokes to an in-memory text field.
+
+    Keeps a virtual clock instead of sleeping, so timing and results can be
+    checked headless and instantly. events holds (time, key) pairs. Keys
+    arriving less than min_gap seconds after the previous one are dropped,
+    like a game polling input too slowly; prepare() and read() let it
+    stand in as a calibration verifier.
+    """
+
+    name = 'recording'
+    batch = True
+    echoes = False
+
+    def __init__(self, text='', min_gap=0.0):
+        self.text = text
+        self.min_gap = min_gap
+        self.clock = 0.0
+        self.last_key = None
+        self.events = []
+        self.dropped = 0
+
+    def press(self, key):
+        """Deliver one key, unless it follows the last too closely"""
+        if self.last_key is not None and self.clock - self.last_key < self.min_gap:
+            self.dropped += 1
+            return
+        self.last_key = self.clock
+        self.events.append((self.clock, key))
+        self.text = self.text[:-1] if key == 'backspace' else self.text + key
+
+    def backspace(self, count, delay):
+        for _ in range(count):
+            self.press('backspace')
+            self.clock += delay
+
+    def type_text(self, text, delay):
+        for char in text:
+            self.press(char)
+            self.clock += delay
+
+    def sleep(self, seconds):
+        self.clock += max(seconds, 0)
+
+    def prepare(self, text):
+        self.text = text
+        self.last_key = None
+
+    def read(self):
+        return self.text
+
+
+BACKENDS = {
+    'keyboard': KeyboardBackend,
+    'pyautogui': PyAutoGUIBackend,
+    'recording': RecordingBackend
+}
+
+
+def send_edit(backend, on_screen, target, delays, batch=False, cancelled=None):
+    """Turn on_screen into target with the fewest keystrokes.
+
+    delays holds the app's start_delay, backspace_delay, after_delete_delay
+    and typing_delay settings; per-key delays are skipped when batch is set
+    and the backend supports it. cancelled, a threading.Event, is checked
+    before every key (or batch) and stops the edit once set. Returns
+    (backspaces, text) as actually sent.
+    """
+    backspaces, text = plan_edit(on_screen, target)
+    per_key = not (batch and backend.batch)
+    stopped = cancelled.is_set if cancelled is not None else lambda: False
+    # Keys go one at a time when they may need to stop midway
+    step = 1 if per_key and cancelled is not None else None
+
+    backend.sleep(delays['start_delay'])
+    deleted = 0
+    while deleted < backspaces and not stopped():
+        count = step or backspaces - deleted
+        backend.backspace(count, delays['backspace_delay'] if per_key else 0)
+        deleted += count
+    if deleted:
+        backend.sleep(delays['after_delete_delay'])
+    typed = 0
+    while typed < len(text) and not stopped():
+        count = step or len(text) - typed
+        backend.type_text(text[typed:typed + count], delays['typing_delay'] if per_key else 0)
+        typed += count
+    return deleted, text[:typed]
@@ -0,0 +1,124 @@
+import logging
+import queue
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+
+class DropOldestQueue(queue.Queue):
+    """Queue whose put never blocks: when full, the oldest item makes room"""
+
+    def __init__(self, maxlen):
+        super().__init__()
+        self.maxlen = maxlen
+        self.dropped = 0
+
+    def _put(self, item):
+        # Runs under the queue's own lock
+        if len(self.queue) >= self.maxlen:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(item)
+
+
+class LogPipeline:
+    """Thread-safe, bounded activity log for a Tk Text widget.
+
+    post() may be called from any thread; it only puts a record on a
+    queue holding at most max_pending records, dropping the oldest when
+    full. The Tk thread drains every pending record each interval
+    milliseconds and inserts them with one widget call, keeping at most
+    max_lines lines and one reusable tag per color. With spill_path set,
+    every record is also appended to a size-rotated log file, written by
+    a listener thread rather than the Tk thread.
+    """
+
+    def __init__(self, root, max_lines=500, interval=50, spill_path=None,
+                 spill_bytes=1 << 20, spill_count=3, max_pending=5000):
+        self.root = root
+        self.max_lines = max_lines
+        self.interval = interval
+        self.records = DropOldestQueue(max_pending)
+        self.shown_dropped = 0
+        self.text = None
+        self.lines = 0
+        self.tags = set()
+        self.spill = None
+        if spill_path:
+            handler = RotatingFileHandler(spill_path, maxBytes=spill_bytes,
+                                          backupCount=spill_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', '%H:%M:%S'))
+            self.spill = QueueListener(DropOldestQueue(max_pending), handler)
+            self.spill.start()
+
+    def post(self, msg, color):
+        """Queue one line for display and the spill file; safe from any thread"""
+        when = time.time()
+        self.records.put((when, msg, color))
+        if self.spill:
+            self.spill.queue.put(logging.makeLogRecord({'msg': msg, 'created': when}))
+
+    def dropped(self):
+        """Records dropped so far, from the display and the spill file"""
+        return self.records.dropped + (self.spill.queue.dropped if self.spill else 0)
+
+    def start(self, text):
+        """Display records in text from now on, draining on the Tk thread"""
+        self.text = text
+        self.root.after(self.interval, self.drain)
+
+    def stop(self):
+        """Write out what the spill file still has queued; call once at exit"""
+        if self.spill:
+            self.spill.stop()
+            for handler in self.spill.handlers:
+                handler.close()
+            self.spill = None
+
+    def clear(self):
+        """Empty the widget; call on the Tk thread"""
+        self.text.config(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.config(state='disabled')
+        self.lines = 0
+
+    def tag(self, color):
+        """The shared tag for a color, configured on first use"""
+        name = 'fg' + color.lstrip('#')
+        if name not in self.tags:
+            self.text.tag_config(name, foreground=color)
+            self.tags.add(name)
+        return name
+
+    def drain(self):
+        """Move every pending record into the widget"""
+        try:
+            batch = []
+            while True:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            total = self.dropped()
+            dropped, self.shown_dropped = total - self.shown_dropped, total
+            lines = [(f"[{time.strftime('%H:%M:%S', time.localtime(when))}] {msg}\n", color)
+                     for when, msg, color in batch]
+            if dropped:
+                lines.insert(0, (f"… {dropped} log line(s) dropped - logged faster than written\n", '#6e7681'))
+            if lines:
+                self.show(lines[-self.max_lines:])
+        finally:
+            self.root.after(self.interval, self.drain)
+
+    def show(self, lines):
+        """Append (line, color) pairs and drop the oldest lines past max_lines"""
+        chunks = []
+        for line, color in lines:
+            chunks += [line, self.tag(color)]
+        self.text.config(state='normal')
+        self.text.insert('end', *chunks)
+        self.lines += sum(line.count('\n') for line, _ in lines)
+        if self.lines > self.max_lines:
+            self.text.delete('1.0', f'{self.lines - self.max_lines + 1}.0')
+            self.lines = self.max_lines
+        self.text.see('end')
+        self.text.config(state='disabled')
@@ -1,18 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import keyboard
-import pyautogui
 import threading
 import time
-import json
 import os
 import sys
 import ctypes
-from collections import defaultdict
-from PIL import ImageGrab, Image, ImageEnhance
+import argparse
+from PIL import Image, ImageEnhance
 import cv2
 import numpy as np
 import pyttsx3
+from word_index import PrefixIndex
+from completion_server import CompletionClient, parse_address
+from completion_controller import CompletionController
+from strategy import LastLetterStrategy
+from scoring import WordScorer
+from fuzzy import FuzzyMatcher
+from log_pipeline import LogPipeline
+from input_trace import TraceRecorder
+from screen_capture import FrameGate, RegionLock, ScreenCapture, parse_region
+from tile_ocr import TileClassifier, normalize_tile, read_tiles
+from keystrokes import BACKENDS
+from calibration import DELAY_RANGES, Calibrator, EntryVerifier, SpeedGovernor
+from word_store import (CompiledDictionary, PackedWords, diff_words, format_bytes,
+                        normalize_words, read_dictionary_json)
 try:
     import pytesseract
     # Try multiple common installation paths
@@ -39,8 +51,17 @@ try:
 except:
     TESSERACT_AVAILABLE = False
 
+# Letter templates learned from Tesseract, reused across runs
+TILE_TEMPLATES = 'tile_templates.npz'
+# Tesseract confidence (0-100) a read needs to become a template
+TEMPLATE_CONFIDENCE = 80
+# Every this many template reads, one is checked against Tesseract too
+SPOT_CHECK_EVERY = 25
+# Seconds the OCR scanner has to show a typed completion for Auto Speed
+READBACK_WINDOW = 5.0
+
 class WordAutofiller:
-    def __init__(self):
+    def __init__(self, server_address=None, log_path=None, trace_path=None, ocr_region=None):
         self.root = tk.Tk()
         self.root.title("Word Autofiller Pro")
         self.root.geometry("700x920")
@@ -57,20 +78,51 @@ class WordAutofiller:
             'after_delete_delay': 0.3,
             'prefer_longer_words': 1.0,
             'min_word_length': 4,
-            'max_suggestions_per_prefix': 50
+            'max_suggestions_per_prefix': 50,
+            'strategy_mode': 0,
+            'strategy_lookahead': 0,
+            'weight_last_rarity': 0.0,
+            'weight_difficulty': 0.0,
+            'weight_frequency': 0.0,
+            'fuzzy_edits': 2,
+            'search_mode': 0,
+            'output_backend': 0,
+            'batch_typing': 0,
+            'auto_speed': 0,
+            'ocr_auto_lock': 1,
+            'ocr_lock_margin': 2.0
         }
         
         # State variables
-        self.is_listening = False
-        self.current_buffer = ""
-        self.used_words = defaultdict(set)
         self.last_completion = ""
-        self.completion_lock = threading.Lock()
         self.current_tab = "main"
+        self.pending_after = {}
+        self.sliders = {}
+        
+        # Any thread may log; the Tk thread shows lines in batches
+        self.log = LogPipeline(self.root, spill_path=log_path)
+        
+        # Keys typed while listening, saved on exit for replay.py
+        self.trace_path = trace_path
+        self.recorder = TraceRecorder() if trace_path else None
+        
+        # Auto Speed checks typed words against what the OCR scanner reads back
+        self.readback = None
+        self.governor = None
+        self.calibrating = False
         
         # OCR variables
         self.ocr_active = False
         self.ocr_thread = None
+        self.ocr_region = RegionLock(ocr_region)
+        self.tile_letters = {}
+        self.tile_classifier = TileClassifier()
+        self.template_reads = 0
+        if os.path.exists(TILE_TEMPLATES):
+            try:
+                self.tile_classifier.load(TILE_TEMPLATES)
+            except Exception as e:
+                print(f"Tile templates unusable ({e}), learning them again")
         self.is_admin = self.check_admin()
         self.tts_engine = None
         if self.is_admin:
@@ -80,15 +132,23 @@ class WordAutofiller:
             except:
                 pass
         
-        # Load words
-        self.words = self.load_words_from_json()
-        if not self.words:
-            return
-            
-        self.word_index = self.build_word_index()
+        # Buffer, engines and typing live in a Tk-free controller, shared with replay.py
+        self.server_address = server_address
+        self.backends = {}
+        self.word_frequencies = {}
+        self.controller = CompletionController(
+            self.settings,
+            self.output_backend,
+            log=self.log_message,
+            on_buffer=lambda: self.root.after(0, self.update_buffer_display),
+            on_completion=self.on_completed,
+            on_infix=lambda: self.root.after(0, self.refresh_memory_stat),
+            on_queue=lambda: self.root.after(0, self.refresh_queue_stat)
+        )
+        self.controller.remote = bool(server_address)
+        self.controller.recorder = self.recorder
         
         self.setup_ui()
-        self.start_keyboard_monitoring()
     
     def set_icon(self):
         """Set application icon"""
@@ -122,7 +182,7 @@ class WordAutofiller:
     
     def detect_letter_tiles(self, screenshot):
         """Detect letter tiles from screenshot"""
-        if not TESSERACT_AVAILABLE:
+        if not TESSERACT_AVAILABLE and not len(self.tile_classifier):
             return []
         
         try:
@@ -138,30 +198,64 @@ class WordAutofiller:
             # Find contours (white squares)
             contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            tiles = []
+            found = []
             for contour in contours:
                 x, y, w, h = cv2.boundingRect(contour)
                 
                 # Filter for square-ish shapes (letter tiles)
                 aspect_ratio = w / float(h) if h > 0 else 0
                 if 0.8 < aspect_ratio < 1.2 and w > 50 and w < 200:
-                    # Extract tile region
-                    tile_img = screenshot.crop((x, y, x + w, y + h))
-                    
-                    # OCR on tile
-                    text = pytesseract.image_to_string(
-                        tile_img,
-                        config='--psm 10 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                    ).strip()
-                    
-                    if len(text) == 1 and text.isalpha():
-                        tiles.append({
-                            'letter': text.upper(),
-                            'x': x,
-                            'y': y,
-                            'w': w,
-                            'h': h
-                        })
+                    # Extract tile region, scaled to a common size
+                    tile_img = normalize_tile(screenshot.crop((x, y, x + w, y + h)))
+                    found.append((x, y, w, h, tile_img, tile_img.tobytes()))
+            
+            # New tiles are matched against learned templates; Tesseract reads
+            # the doubtful ones together, as one strip, and teaches the templates.
+            # A few template reads go along as spot checks, so a bad template
+            # is caught and replaced.
+            if len(self.tile_letters) > 512:
+                self.tile_letters.clear()
+            unread = list({key: tile_img for *_, tile_img, key in found if key not in self.tile_letters}.items())
+            guesses = self.tile_classifier.classify([tile_img for _, tile_img in unread])
+            doubtful = []
+            for (key, tile_img), guess in zip(unread, guesses):
+                if guess:
+                    self.tile_letters[key] = guess
+                    self.template_reads += 1
+                    if self.template_reads % SPOT_CHECK_EVERY == 0:
+                        doubtful.append((key, tile_img, guess))
+                else:
+                    doubtful.append((key, tile_img, None))
+            if doubtful and TESSERACT_AVAILABLE:
+                reads = read_tiles([tile_img for _, tile_img, _ in doubtful])
+                for (key, tile_img, guess), (letter, confidence) in zip(doubtful, reads):
+                    confident = letter and confidence >= TEMPLATE_CONFIDENCE
+                    if guess is None:
+                        self.tile_letters[key] = letter
+                        if confident:
+                            self.tile_classifier.learn(tile_img, letter)
+                    elif confident and letter != guess:
+                        self.tile_letters[key] = letter
+                        dropped = self.tile_classifier.correct(tile_img, letter)
+                        self.log_message(f"🔧 Templates read '{guess}' where Tesseract reads '{letter}' - "
+                                         f"{dropped} template(s) replaced", "#f0883e")
+                if self.tile_classifier.unsaved:
+                    try:
+                        self.tile_classifier.save(TILE_TEMPLATES)
+                    except OSError as e:
+                        self.log_message(f"Could not save tile templates: {str(e)}", "#f85149")
+            
+            tiles = []
+            for x, y, w, h, _, key in found:
+                text = self.tile_letters.get(key, '')
+                if len(text) == 1 and text.isalpha():
+                    tiles.append({
+                        'letter': text.upper(),
+                        'x': x,
+                        'y': y,
+                        'w': w,
+                        'h': h
+                    })
             
             return tiles
         except Exception as e:
@@ -205,14 +299,33 @@ class WordAutofiller:
     def ocr_scanner_loop(self):
         """Continuous OCR scanning loop"""
         self.log_message("🔍 OCR Scanner started", "#58a6ff")
+        capture = ScreenCapture()
+        gate = FrameGate()
+        tiles = []
+        self.ocr_region.reset()
         
         while self.ocr_active:
             try:
-                # Take screenshot
-                screenshot = ImageGrab.grab()
+                # Take screenshot of the locked region, the set region, or the screen
+                self.ocr_region.auto = bool(self.settings['ocr_auto_lock'])
+                self.ocr_region.margin = self.settings['ocr_lock_margin']
+                screenshot, box = capture.grab(self.ocr_region.box())
+                
+                # Detect letter tiles; an unchanged screen shows the ones already read
+                fresh = gate.changed(screenshot, box)
+                if fresh:
+                    tiles = self.detect_letter_tiles(screenshot)
                 
-                # Detect letter tiles
-                tiles = self.detect_letter_tiles(screenshot)
+                change = self.ocr_region.update(tiles, box)
+                if change == 'locked':
+                    left, top, right, bottom = self.ocr_region.box()
+                    self.log_message(f"🎯 Capture locked to {right - left}x{bottom - top} at ({left}, {top})", "#58a6ff")
+                elif change == 'released':
+                    self.log_message("🔭 Tiles gone - scanning the full area again", "#6e7681")
+                
+                if not fresh:
+                    time.sleep(0.3)
+                    continue
                 
                 if tiles:
                     layout, letters = self.analyze_tile_layout(tiles)
@@ -221,16 +334,20 @@ class WordAutofiller:
                         # Single letter or horizontal line detected
                         word = ''.join(letters).lower()
                         self.log_message(f"📸 Detected: {word.upper()}", "#f0883e")
+                        self.check_readback(word)
                         
                         # Speak the letters
                         threading.Thread(target=lambda: self.speak(word.upper()), daemon=True).start()
                         
+                        # A whole dictionary word on screen was played by someone
+                        if len(word) >= 3 and self.controller.index_ready and self.controller.mark_played(word):
+                            self.log_message(f"📝 '{word}' marked as played", "#6e7681")
+                        
                         # Set buffer and trigger completion
-                        self.current_buffer = word
-                        self.root.after(0, self.update_buffer_display)
+                        self.controller.set_buffer(word)
                         
                         time.sleep(0.5)  # Small delay before completion
-                        threading.Thread(target=self.trigger_completion, daemon=True).start()
+                        self.controller.request_completion()
                         
                         time.sleep(2)  # Wait before next scan
                         
@@ -256,7 +373,7 @@ class WordAutofiller:
             )
             return
         
-        if not TESSERACT_AVAILABLE:
+        if not TESSERACT_AVAILABLE and not len(self.tile_classifier):
             messagebox.showerror(
                 "Tesseract Not Found",
                 "Tesseract OCR not found!\n\n"
@@ -271,7 +388,7 @@ class WordAutofiller:
             )
             return
         
-        if not self.is_listening:
+        if not self.controller.listening:
             messagebox.showwarning(
                 "Not Listening",
                 "Please activate 'START LISTENING' first!"
@@ -297,37 +414,209 @@ class WordAutofiller:
             if self.ocr_thread:
                 self.ocr_thread = None
         
+    def find_compiled_dictionary(self):
+        """Locate an up-to-date words.bin"""
+        if os.path.exists('words.bin'):
+            # A words.json edited after compiling wins over the stale binary
+            if not os.path.exists('words.json') or \
+               os.path.getmtime('words.bin') >= os.path.getmtime('words.json'):
+                return 'words.bin'
+            return None
+        if getattr(sys, 'frozen', False) and not os.path.exists('words.json'):
+            bundled = os.path.join(sys._MEIPASS, 'words.bin')
+            if os.path.exists(bundled):
+                return bundled
+        return None
+    
+    def load_words(self):
+        """Map the compiled dictionary, falling back to words.json"""
+        path = self.find_compiled_dictionary()
+        if path:
+            try:
+                words = CompiledDictionary(path)
+                print(f"Mapped {len(words)} words from {path}")
+                return words
+            except Exception as e:
+                print(f"Compiled dictionary unusable ({e}), loading words.json")
+        return self.load_words_from_json()
+    
     def load_words_from_json(self):
         """Load words from words.json file"""
+        if not os.path.exists('words.json'):
+            raise FileNotFoundError("words.json not found!")
+        words, self.word_frequencies = read_dictionary_json('words.json')
+        print(f"Loaded {len(words)} words")
+        return words
+    
+    def start_word_loader(self):
+        """Load and index words on a background thread"""
+        self.set_stat("Dictionary", "Loading...")
+        threading.Thread(target=self.word_loader, daemon=True).start()
+    
+    def word_loader(self):
+        """Load words, publishing progressively larger index snapshots"""
+        if self.server_address:
+            self.connect_to_server()
+            return
+        
+        # Taken before reading so edits made while loading still trigger a reload
+        signature = self.file_signature('words.json')
         try:
-            if os.path.exists('words.json'):
-                with open('words.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, dict) and 'words' in data:
-                        words = data['words']
-                    elif isinstance(data, list):
-                        words = data
-                    else:
-                        raise ValueError("Invalid JSON format")
-                    print(f"Loaded {len(words)} words")
-                    return words
-            else:
-                messagebox.showerror("Error", "words.json not found!")
-                self.root.destroy()
-                return []
+            words = self.load_words()
+        except FileNotFoundError as e:
+            self.root.after(0, self.on_load_failed, str(e))
+            return
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load: {str(e)}")
-            self.root.destroy()
-            return []
+            self.root.after(0, self.on_load_failed, f"Failed to load: {str(e)}")
+            return
+        
+        self.root.after(0, self.set_stat, "Total Words Loaded", len(words))
         
-    def build_word_index(self):
-        """Build word index"""
-        index = defaultdict(list)
-        for word in self.words:
-            if len(word) >= self.settings['min_word_length']:
-                for i in range(1, min(len(word) + 1, 5)):
-                    index[word[:i].lower()].append(word.lower())
-        return index
+        if isinstance(words, CompiledDictionary):
+            # Sorted and indexed on disk already
+            self.controller.word_index = PrefixIndex(words)
+        else:
+            # Sorted once; every snapshot takes every step-th word, which stays
+            # sorted and spans the alphabet. Each one doubles, so the total
+            # work stays about twice one full build.
+            words = normalize_words(words)
+            total = len(words)
+            step = 1
+            while total // (step * 2) >= 25000:
+                step *= 2
+            while True:
+                store = PackedWords(words[::step], normalized=True)
+                with self.controller.completion_lock, self.controller.played_lock:
+                    # Words played while loading stay played
+                    self.controller.word_index = self.controller.word_index.rebuilt(store)
+                if step == 1:
+                    break
+                self.root.after(0, self.set_stat, "Dictionary", f"Indexing {100 // step}%")
+                step //= 2
+        
+        with self.controller.played_lock:
+            # Counts the words played so far, then follows every mark
+            self.controller.strategy = LastLetterStrategy(self.controller.word_index)
+        self.controller.scorer = WordScorer(self.controller.word_index, self.word_frequencies)
+        self.controller.fuzzy = FuzzyMatcher(self.controller.word_index)
+        self.controller.index_ready = True
+        self.root.after(0, self.on_words_loaded)
+        # Polled from its own thread so this frame, and the raw word list, can go
+        threading.Thread(target=self.dictionary_watcher, args=(signature,), daemon=True).start()
+    
+    def file_signature(self, path):
+        """Return (mtime, size) of path, or None if it is missing"""
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+    
+    def dictionary_watcher(self, signature):
+        """Poll words.json and hot-reload it when it changes"""
+        while True:
+            time.sleep(2)
+            current = self.file_signature('words.json')
+            if current is None or current == signature:
+                continue
+            signature = current
+            try:
+                self.reload_dictionary()
+            except Exception as e:
+                self.log_message(f"✗ Reload failed: {str(e)}", "#f85149")
+    
+    def reload_dictionary(self):
+        """Apply words.json changes to the live index, keeping used words"""
+        raw_words, frequencies = read_dictionary_json('words.json')
+        words = normalize_words(raw_words)
+        added, removed = diff_words(self.controller.word_index.words, words)
+        if not added and not removed:
+            if frequencies != self.word_frequencies:
+                self.controller.scorer = WordScorer(self.controller.word_index, frequencies)
+                self.word_frequencies = frequencies
+            return
+        
+        # Index, scores and fuzzy levels depend on the words alone, so they are
+        # built outside the lock; played words and the strategy's counts follow them
+        store = PackedWords(words, normalized=True)
+        index = PrefixIndex(store)
+        scorer = WordScorer(index, frequencies)
+        fuzzy = FuzzyMatcher(index)
+        with self.controller.completion_lock, self.controller.played_lock:
+            self.controller.word_index.carry_played(index)
+            self.controller.strategy = LastLetterStrategy(index)
+            self.controller.scorer = scorer
+            self.controller.fuzzy = fuzzy
+            # Rebuilt from the new store by the next contains-mode query
+            self.controller.infix = None
+            self.controller.word_index = index
+            self.word_frequencies = frequencies
+        
+        self.root.after(0, self.on_dictionary_reloaded, len(added), len(removed))
+    
+    def on_dictionary_reloaded(self, added, removed):
+        """Report a hot reload"""
+        self.set_stat("Total Words Loaded", len(self.controller.word_index))
+        self.set_stat("Unique Prefixes", self.controller.word_index.node_count)
+        self.refresh_memory_stat()
+        self.log_message(f"♻️ words.json reloaded (+{added} / -{removed} words)", "#58a6ff")
+    
+    def connect_to_server(self):
+        """Use a completion server instead of a local index"""
+        client = CompletionClient(self.server_address)
+        try:
+            client.stats()
+        except Exception as e:
+            self.root.after(0, self.on_load_failed, f"Cannot reach completion server: {str(e)}")
+            return
+        
+        self.controller.word_index = client
+        self.controller.index_ready = True
+        self.root.after(0, self.on_words_loaded)
+    
+    def on_words_loaded(self):
+        """Report a finished dictionary load"""
+        self.set_stat("Dictionary", "Ready ✓")
+        self.set_stat("Total Words Loaded", len(self.controller.word_index))
+        self.set_stat("Unique Prefixes", self.controller.word_index.node_count)
+        self.refresh_memory_stat()
+        self.log_message(f"📚 {len(self.controller.word_index)} words loaded", "#58a6ff")
+    
+    def refresh_memory_stat(self):
+        """Show the index's memory footprint on the Stats tab"""
+        # With --connect this asks the server, which must not stall the Tk thread
+        threading.Thread(target=self.measure_memory, daemon=True).start()
+    
+    def measure_memory(self):
+        """Work out the Index Memory stat and post it to the Tk thread"""
+        try:
+            usage = self.controller.word_index.memory_usage()
+        except (OSError, RuntimeError):
+            self.root.after(0, self.set_stat, "Index Memory", "Server unavailable")
+            return
+        held = usage['store'] + usage['ranked'] + usage.get('infix', 0)
+        infix = self.controller.infix
+        if infix is not None:
+            held += infix.memory_usage()
+        text = format_bytes(held)
+        if usage['mapped']:
+            text += f" (+{format_bytes(usage['mapped'])} mapped)"
+        if self.server_address:
+            text += " on server"
+        self.root.after(0, self.set_stat, "Index Memory", text)
+    
+    def refresh_queue_stat(self):
+        """Show completion queue depth and trigger wait times on the Stats tab"""
+        stats = self.controller.worker.stats()
+        state = "typing" if stats['running'] else "idle"
+        self.set_stat("Completion Queue",
+                      f"{stats['depth']} queued, {state} · wait p50 {stats['wait_p50'] * 1000:.0f} ms, "
+                      f"max {stats['wait_max'] * 1000:.0f} ms")
+    
+    def on_load_failed(self, message):
+        """Report a failed dictionary load and quit"""
+        messagebox.showerror("Error", message)
+        self.root.destroy()
         
     def setup_ui(self):
         """Setup modern UI"""
@@ -433,6 +722,8 @@ class WordAutofiller:
         else:
             self.stats_tab_btn.config(bg='#58a6ff', fg='#0d1117')
             self.stats_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+            if self.controller.index_ready:
+                self.refresh_memory_stat()
     
     def setup_main_tab(self):
         """Main tab"""
@@ -494,6 +785,15 @@ class WordAutofiller:
         )
         self.manual_btn.grid(row=0, column=1, padx=10)
         
+        self.new_match_btn = self.create_button(
+            controls,
+            "NEW MATCH",
+            self.new_match,
+            '#6e40c9',
+            '#8957e5'
+        )
+        self.new_match_btn.grid(row=0, column=2, padx=10)
+        
         # OCR Scanner button (only show if admin)
         if self.is_admin:
             self.ocr_btn = self.create_button(
@@ -503,7 +803,7 @@ class WordAutofiller:
                 '#9e6a03',
                 '#c69026'
             )
-            self.ocr_btn.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+            self.ocr_btn.grid(row=1, column=0, columnspan=3, pady=(10, 0))
             
             # Admin badge
             admin_label = tk.Label(
@@ -513,7 +813,7 @@ class WordAutofiller:
                 bg='#0d1117',
                 fg='#7ee787'
             )
-            admin_label.grid(row=2, column=0, columnspan=2, pady=5)
+            admin_label.grid(row=2, column=0, columnspan=3, pady=5)
         else:
             # Not admin warning
             warning_label = tk.Label(
@@ -523,7 +823,7 @@ class WordAutofiller:
                 bg='#0d1117',
                 fg='#f0883e'
             )
-            warning_label.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+            warning_label.grid(row=1, column=0, columnspan=3, pady=(10, 0))
         
         # Log card
         log_card = self.create_card(self.main_frame, "ACTIVITY LOG")
@@ -564,6 +864,7 @@ class WordAutofiller:
         )
         self.log_text.pack(padx=10, pady=(0, 10), fill=tk.BOTH, expand=True)
         log_scroll.config(command=self.log_text.yview)
+        self.log.start(self.log_text)
     
     def setup_usage_tab(self):
         """Usage guide tab"""
@@ -611,16 +912,24 @@ class WordAutofiller:
                 "• Type starting letters based on the previous word's last letter",
                 "• Press INSERT to quickly complete challenging words",
                 "• The app remembers used words and suggests new ones",
+                "• Press NEW MATCH when a match starts to clear played words",
                 "• OCR mode detects game letters automatically"
             ]),
             ("⚙️ CUSTOMIZATION", [
                 "• Visit the SETTINGS tab to adjust timing",
                 "• Increase delays if typing doesn't work in some apps",
                 "• For games like Roblox: Use 0.3-0.5s delays",
-                "• Prefer longer words for higher scores"
+                "• Prefer longer words for higher scores",
+                "• Strategy Mode picks words whose last letter leaves the opponent the fewest replies",
+                "• Scoring Weights blend length with last-letter rarity, letter difficulty and frequency",
+                "• CALIBRATE SPEED finds the fastest delays that still register",
+                "• Auto Speed checks typed words with the OCR scanner and slows down on missing letters",
+                "• OCR Fuzzy Match corrects misread letters (O/Q, I/L...) when nothing matches",
+                "• Search Mode CONTAINS finds words with the typed letters anywhere inside,",
+                "  ranked by Strategy Mode or Scoring Weights when those are on"
             ]),
             ("📊 KEY FEATURES", [
-                "✓ Never suggests the same word twice for a prefix",
+                "✓ Never suggests a word already played this match",
                 "✓ Prefers longer words for better gameplay",
                 "✓ Works in most applications and games",
                 "✓ Real-time activity logging",
@@ -690,24 +999,86 @@ class WordAutofiller:
         
     def setup_settings_tab(self):
         """Settings tab"""
+        # Scrollable, so every card fits the window
+        canvas = tk.Canvas(self.settings_frame, bg='#0d1117', highlightthickness=0)
+        scrollbar = tk.Scrollbar(self.settings_frame, orient="vertical", command=canvas.yview)
+        settings_inner = tk.Frame(canvas, bg='#0d1117')
+        
+        settings_inner.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        
+        window = canvas.create_window((0, 0), window=settings_inner, anchor="nw")
+        canvas.bind("<Configure>", lambda e: canvas.itemconfig(window, width=e.width))
+        canvas.configure(yscrollcommand=scrollbar.set)
+        
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
         # Timing settings
-        timing_card = self.create_card(self.settings_frame, "TIMING SETTINGS")
+        timing_card = self.create_card(settings_inner, "TIMING SETTINGS")
+        
+        self.create_slider(timing_card, "Backspace Delay", 'backspace_delay', *DELAY_RANGES['backspace_delay'])
+        self.create_slider(timing_card, "Typing Delay", 'typing_delay', *DELAY_RANGES['typing_delay'])
+        self.create_slider(timing_card, "Start Delay", 'start_delay', *DELAY_RANGES['start_delay'])
+        self.create_slider(timing_card, "After Delete Delay", 'after_delete_delay', *DELAY_RANGES['after_delete_delay'])
+        self.create_slider(timing_card, "Output Backend", 'output_backend', 0, 1, 1,
+                          labels=["KEYBOARD", "PYAUTOGUI"])
+        self.create_slider(timing_card, "Batch Typing", 'batch_typing', 0, 1, 1,
+                          labels=["OFF", "ON"])
+        self.create_slider(timing_card, "Auto Speed", 'auto_speed', 0, 1, 1,
+                          labels=["OFF", "ON"])
+        
+        calibrate_frame = tk.Frame(timing_card, bg='#161b22')
+        calibrate_frame.pack(pady=(0, 15))
         
-        self.create_slider(timing_card, "Backspace Delay", 'backspace_delay', 0.05, 1.0, 0.05)
-        self.create_slider(timing_card, "Typing Delay", 'typing_delay', 0.05, 1.0, 0.05)
-        self.create_slider(timing_card, "Start Delay", 'start_delay', 0.1, 2.0, 0.1)
-        self.create_slider(timing_card, "After Delete Delay", 'after_delete_delay', 0.1, 2.0, 0.1)
+        self.create_button(
+            calibrate_frame,
+            "CALIBRATE SPEED",
+            self.start_calibration,
+            '#1f6feb',
+            '#388bfd'
+        ).pack()
         
         # Word settings
-        word_card = self.create_card(self.settings_frame, "WORD PREFERENCES")
+        word_card = self.create_card(settings_inner, "WORD PREFERENCES")
         
         self.create_slider(word_card, "Prefer Longer Words", 'prefer_longer_words', 0.0, 1.0, 0.1, 
                           labels=["SHORTEST", "LONGEST"])
         self.create_slider(word_card, "Minimum Word Length", 'min_word_length', 3, 10, 1)
         self.create_slider(word_card, "Max Suggestions", 'max_suggestions_per_prefix', 10, 100, 10)
+        self.create_slider(word_card, "Strategy Mode", 'strategy_mode', 0, 1, 1,
+                          labels=["LENGTH", "STARVE OPPONENT"])
+        self.create_slider(word_card, "Strategy Lookahead", 'strategy_lookahead', 0, 1, 1,
+                          labels=["OFF", "ON"])
+        self.create_slider(word_card, "OCR Fuzzy Match (edits)", 'fuzzy_edits', 0, 2, 1)
+        self.create_slider(word_card, "Search Mode", 'search_mode', 0, 1, 1,
+                          labels=["PREFIX", "CONTAINS"])
+        
+        # OCR capture area
+        ocr_card = self.create_card(settings_inner, "OCR SCANNER")
+        
+        self.create_slider(ocr_card, "Auto-Lock Region", 'ocr_auto_lock', 0, 1, 1,
+                          labels=["OFF", "ON"])
+        self.create_slider(ocr_card, "Lock Margin (tiles)", 'ocr_lock_margin', 0.5, 5.0, 0.5)
+        
+        # Scoring weights (all zero ranks by length alone)
+        scoring_card = self.create_card(settings_inner, "SCORING WEIGHTS")
+        
+        self.create_slider(scoring_card, "Last Letter Rarity", 'weight_last_rarity', 0.0, 1.0, 0.1)
+        self.create_slider(scoring_card, "Letter Difficulty", 'weight_difficulty', 0.0, 1.0, 0.1)
+        self.create_slider(scoring_card, "Word Frequency", 'weight_frequency', 0.0, 1.0, 0.1)
+        
+        if self.server_address:
+            # The server ranks by length alone and has no fuzzy matcher
+            for key in ('strategy_mode', 'strategy_lookahead', 'fuzzy_edits',
+                        'weight_last_rarity', 'weight_difficulty', 'weight_frequency'):
+                self.sliders[key].config(state=tk.DISABLED)
+            self.log_message("ℹ Strategy, fuzzy and scoring settings are off with --connect", "#6e7681")
         
         # Reset button
-        reset_frame = tk.Frame(self.settings_frame, bg='#0d1117')
+        reset_frame = tk.Frame(settings_inner, bg='#0d1117')
         reset_frame.pack(pady=20)
         
         self.create_button(
@@ -731,9 +1102,12 @@ class WordAutofiller:
         admin_status = "Yes 🛡️" if self.is_admin else "No"
         
         stats_data = [
-            ("Total Words Loaded", len(self.words)),
-            ("Unique Prefixes", len(self.word_index)),
+            ("Dictionary", "Loading..."),
+            ("Total Words Loaded", len(self.controller.word_index)),
+            ("Unique Prefixes", self.controller.word_index.node_count),
+            ("Index Memory", "-"),
             ("Total Completions", 0),
+            ("Completion Queue", "Idle"),
             ("Admin Mode", admin_status),
             ("OCR Available", ocr_status),
             ("Current Session", "Active")
@@ -761,6 +1135,10 @@ class WordAutofiller:
             val_label.pack(side=tk.RIGHT)
             self.stats_labels[label] = val_label
         
+    def set_stat(self, label, value):
+        """Update a Stats tab value"""
+        self.stats_labels[label].config(text=str(value))
+        
     def create_card(self, parent, title):
         """Create a card container"""
         card = tk.Frame(parent, bg='#161b22', relief=tk.FLAT)
@@ -844,6 +1222,7 @@ class WordAutofiller:
         )
         slider.set(self.settings[key])
         slider.pack(fill=tk.X, pady=5)
+        self.sliders[key] = slider
         
     def update_setting(self, key, value, label, labels=None):
         """Update setting"""
@@ -855,8 +1234,21 @@ class WordAutofiller:
         label.config(text=text)
         
         if key == 'min_word_length':
-            self.word_index = self.build_word_index()
-            self.log_message(f"⚙️ Rebuilt index with min length {int(value)}", "#58a6ff")
+            # Applied per query, so only the log line waits for the slider to settle
+            self.debounce(key, 400, lambda: self.log_message(
+                f"⚙️ Min word length set to {self.settings['min_word_length']}", "#58a6ff"))
+    
+    def debounce(self, key, delay_ms, callback):
+        """Run callback once no call with the same key arrived for delay_ms"""
+        pending = self.pending_after.pop(key, None)
+        if pending:
+            self.root.after_cancel(pending)
+        
+        def fire():
+            self.pending_after.pop(key, None)
+            callback()
+        
+        self.pending_after[key] = self.root.after(delay_ms, fire)
     
     def reset_settings(self):
         """Reset settings"""
@@ -867,200 +1259,226 @@ class WordAutofiller:
             'after_delete_delay': 0.3,
             'prefer_longer_words': 1.0,
             'min_word_length': 4,
-            'max_suggestions_per_prefix': 50
+            'max_suggestions_per_prefix': 50,
+            'strategy_mode': 0,
+            'strategy_lookahead': 0,
+            'weight_last_rarity': 0.0,
+            'weight_difficulty': 0.0,
+            'weight_frequency': 0.0,
+            'fuzzy_edits': 2,
+            'search_mode': 0,
+            'output_backend': 0,
+            'batch_typing': 0,
+            'auto_speed': 0,
+            'ocr_auto_lock': 1,
+            'ocr_lock_margin': 2.0
         }
+        self.controller.settings = self.settings
+        self.governor = None
         self.log_message("⚙️ Settings reset", "#f0883e")
         self.switch_tab("settings")
         
     def update_buffer_display(self):
         """Update buffer"""
-        if self.current_buffer:
-            self.buffer_display.config(text=f'"{self.current_buffer}"', fg='#7ee787')
+        if self.controller.current_buffer:
+            self.buffer_display.config(text=f'"{self.controller.current_buffer}"', fg='#7ee787')
         else:
             self.buffer_display.config(text="[EMPTY]", fg='#6e7681')
     
     def clear_log(self):
         """Clear log"""
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        self.log.clear()
         
     def log_message(self, msg, color="#7ee787"):
-        """Log message"""
-        self.log_text.config(state=tk.NORMAL)
-        start = self.log_text.index(tk.END)
-        self.log_text.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {msg}\n")
-        end = self.log_text.index(tk.END)
-        tag = f"tag_{time.time()}"
-        self.log_text.tag_add(tag, start, end)
-        self.log_text.tag_config(tag, foreground=color)
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        """Log message; safe from any thread"""
+        self.log.post(msg, color)
         
     def toggle_listening(self):
         """Toggle listening"""
-        self.is_listening = not self.is_listening
+        self.controller.listening = not self.controller.listening
         
-        if self.is_listening:
+        if self.controller.listening:
             self.status_dot.config(fg='#3fb950')
             self.status_text.config(text="ACTIVE")
             self.toggle_btn.config(text="STOP LISTENING", bg='#da3633', activebackground='#f85149')
             self.log_message("✓ Listening activated", "#3fb950")
-            self.current_buffer = ""
-            self.update_buffer_display()
+            self.controller.set_buffer("")
         else:
             self.status_dot.config(fg='#f85149')
             self.status_text.config(text="INACTIVE")
             self.toggle_btn.config(text="START LISTENING", bg='#238636', activebackground='#2ea043')
             self.log_message("✗ Listening deactivated", "#f85149")
-            self.current_buffer = ""
-            self.update_buffer_display()
+            self.controller.set_buffer("")
+    
+    def new_match(self):
+        """Forget every word played in the current match"""
+        # A completion server is asked off the Tk thread
+        threading.Thread(target=self.reset_match, daemon=True).start()
+    
+    def reset_match(self):
+        """Clear the played words, locally or on the server; logs the outcome"""
+        try:
+            self.controller.reset_played()
+        except (OSError, RuntimeError) as e:
+            self.log_message(f"✗ Completion server error: {str(e)}", "#f85149")
+            return
+        self.log_message("🆕 New match - played words cleared", "#58a6ff")
     
     def manual_complete(self):
         """Manual completion"""
-        if not self.is_listening:
+        if not self.controller.listening:
             self.log_message("⚠ Activate listening first", "#f0883e")
             return
         self.log_message("🖱️ Manual trigger", "#58a6ff")
-        threading.Thread(target=self.trigger_completion, daemon=True).start()
-    
-    def start_keyboard_monitoring(self):
-        """Monitor keyboard"""
-        def monitor():
-            self.log_message("⌨️ Keyboard monitoring started", "#58a6ff")
-            
-            def on_insert(e):
-                if self.is_listening and e.event_type == keyboard.KEY_DOWN:
-                    self.log_message("⌨️ INSERT pressed", "#f0883e")
-                    threading.Thread(target=self.trigger_completion, daemon=True).start()
-            
-            keyboard.on_press_key('insert', on_insert)
-            try:
-                keyboard.add_hotkey('insert', lambda: self.on_insert_hotkey())
-            except:
-                pass
-        
-        threading.Thread(target=monitor, daemon=True).start()
-    
-    def on_insert_hotkey(self):
-        """INSERT hotkey"""
-        if self.is_listening:
-            threading.Thread(target=self.trigger_completion, daemon=True).start()
+        self.controller.request_completion()
     
     def start_keyboard_listener(self):
-        """Listen to typing"""
+        """Listen to typing; INSERT and every other key go to the controller"""
         def on_key(e):
-            if not self.is_listening:
-                return
-            
             try:
-                if e.event_type == keyboard.KEY_DOWN and len(e.name) == 1 and e.name.isalpha():
-                    self.current_buffer += e.name.lower()
-                    self.root.after(0, self.update_buffer_display)
-                    self.log_message(f"+ '{e.name}' → '{self.current_buffer}'", "#58a6ff")
-                elif e.name == 'backspace' and e.event_type == keyboard.KEY_DOWN:
-                    if self.current_buffer:
-                        self.current_buffer = self.current_buffer[:-1]
-                        self.root.after(0, self.update_buffer_display)
-                elif e.name in ['space', 'enter'] and e.event_type == keyboard.KEY_DOWN:
-                    if self.current_buffer:
-                        self.log_message(f"⟲ Buffer reset", "#6e7681")
-                    self.current_buffer = ""
-                    self.root.after(0, self.update_buffer_display)
+                self.controller.key_event(e.name, e.event_type)
             except:
                 pass
         
         keyboard.hook(on_key)
+        self.log_message("⌨️ Keyboard monitoring started", "#58a6ff")
         
-    def find_completion(self, prefix):
-        """Find completion - prefers longer words"""
-        if not prefix:
-            return None
-            
-        prefix = prefix.lower()
-        possible = set()
-        
-        for key in self.word_index:
-            if key.startswith(prefix):
-                possible.update(self.word_index[key])
-        
-        candidates = [w for w in possible 
-                     if w.startswith(prefix) and w != prefix and w not in self.used_words[prefix]]
-        
-        if not candidates:
-            all_possible = [w for w in possible if w.startswith(prefix) and w != prefix]
-            if all_possible:
-                self.used_words[prefix].clear()
-                self.log_message(f"↻ Cycled through all words for '{prefix}'", "#f0883e")
-                candidates = all_possible
-            else:
-                return None
+    def on_completed(self, prefix, word, speculated):
+        """Have the OCR scanner check that a typed word arrived whole"""
+        if word and self.settings['auto_speed'] and self.ocr_active:
+            self.readback = (word, time.monotonic() + READBACK_WINDOW)
+    
+    def check_readback(self, seen):
+        """Tell the speed governor whether the screen shows all of the last typed word"""
+        pending = self.readback
+        if pending is None:
+            return
+        if time.monotonic() > pending[1]:
+            self.readback = None
+            return
+        expected = pending[0]
+        if not seen or seen[0] != expected[0]:
+            # Some other word; no evidence either way, so keep waiting for ours
+            return
+        self.readback = None
+        if self.governor is None:
+            self.governor = SpeedGovernor(self.settings)
+        # A misread letter keeps the length; only missing letters mean dropped keys
+        ok = len(seen) >= len(expected)
+        if not ok:
+            self.log_message(f"🐢 Screen shows '{seen}' for '{expected}' - slowing down", "#f0883e")
+        if self.governor.report(ok):
+            self.root.after(0, self.refresh_delay_sliders)
+    
+    def refresh_delay_sliders(self):
+        """Move the delay sliders to the current settings"""
+        for key in DELAY_RANGES:
+            value = self.settings[key]
+            self.sliders[key].set(value)
+            self.settings[key] = value
+    
+    def start_calibration(self):
+        """Open a test field and calibrate the delays against it"""
+        if self.calibrating:
+            return
+        self.calibrating = True
         
-        # Sort by length based on preference
-        preference = self.settings['prefer_longer_words']
-        candidates.sort(key=len, reverse=(preference > 0.5))
+        window = tk.Toplevel(self.root)
+        window.title("Calibrating")
+        window.configure(bg='#0d1117')
+        window.attributes('-topmost', True)
         
-        # Limit suggestions
-        candidates = candidates[:self.settings['max_suggestions_per_prefix']]
+        tk.Label(
+            window,
+            text="Typing test words here - don't touch the keyboard",
+            font=("Segoe UI", 10),
+            bg='#0d1117',
+            fg='#c9d1d9'
+        ).pack(padx=20, pady=(15, 5))
         
-        if candidates:
-            word = candidates[0]
-            self.used_words[prefix].add(word)
-            return word
-        return None
+        entry = tk.Entry(window, font=("Consolas", 14), bg='#161b22', fg='#7ee787',
+                         insertbackground='#7ee787', relief=tk.FLAT, width=24)
+        entry.pack(padx=20, pady=(5, 15))
         
-    def trigger_completion(self):
-        """Trigger completion"""
-        with self.completion_lock:
-            if not self.current_buffer:
-                self.log_message("⚠ No prefix", "#f85149")
-                return
-                
-            prefix = self.current_buffer
-            completion = self.find_completion(prefix)
-            
-            if completion:
-                remaining = completion[len(prefix):]
-                time.sleep(self.settings['start_delay'])
-                
-                try:
-                    self.log_message(f"← Deleting...", "#f0883e")
-                    for i in range(5):
-                        keyboard.press_and_release('backspace')
-                        time.sleep(self.settings['backspace_delay'])
-                    
-                    time.sleep(self.settings['after_delete_delay'])
-                    
-                    self.log_message(f"→ Typing '{remaining}'...", "#58a6ff")
-                    for char in remaining:
-                        try:
-                            keyboard.send(char)
-                        except:
-                            try:
-                                pyautogui.press(char)
-                            except:
-                                keyboard.write(char)
-                        time.sleep(self.settings['typing_delay'])
-                    
-                    self.log_message(f"✓ '{prefix}' → '{completion}'", "#3fb950")
-                    self.current_buffer = ""
-                    self.root.after(0, self.update_buffer_display)
-                except Exception as e:
-                    self.log_message(f"✗ Error: {str(e)}", "#f85149")
+        calibrator = Calibrator(self.output_backend(), EntryVerifier(self.root, entry))
+        
+        def cancel():
+            calibrator.cancelled.set()
+            window.destroy()
+        
+        window.protocol("WM_DELETE_WINDOW", cancel)
+        
+        def progress(key, value):
+            if value is None:
+                self.log_message(f"⏱ {key}: never reliable, left unchanged", "#f0883e")
             else:
-                self.log_message(f"✗ No completion for '{prefix}'", "#f85149")
-            
+                self.log_message(f"⏱ {key}: {value:.2f}s", "#58a6ff")
+        
+        def work():
+            self.log_message("⏱ Calibrating typing speed...", "#58a6ff")
+            self.controller.injecting = True
+            try:
+                delays = calibrator.run(self.settings, progress)
+            finally:
+                self.controller.injecting = False
+            self.root.after(0, self.finish_calibration, window, calibrator, delays)
+        
+        threading.Thread(target=work, daemon=True).start()
+    
+    def finish_calibration(self, window, calibrator, delays):
+        """Apply calibrated delays and let the governor keep them honest"""
+        self.calibrating = False
+        if window.winfo_exists():
+            window.destroy()
+        if calibrator.cancelled.is_set():
+            self.log_message("⏱ Calibration cancelled", "#f0883e")
+            return
+        
+        for key in DELAY_RANGES:
+            self.settings[key] = delays[key]
+        self.refresh_delay_sliders()
+        self.governor = SpeedGovernor(self.settings, delays)
+        total = sum(delays[key] for key in DELAY_RANGES)
+        self.log_message(f"✓ Calibrated delays ({total:.2f}s of fixed waits per completion)", "#3fb950")
+        
+    def output_backend(self):
+        """Return the keystroke backend picked in settings"""
+        name = ('keyboard', 'pyautogui')[int(self.settings['output_backend'])]
+        backend = self.backends.get(name)
+        if backend is None:
+            backend = self.backends[name] = BACKENDS[name]()
+        return backend
+        
     def run(self):
         """Run app"""
-        if self.words:
-            self.log_message("═" * 40, "#c9d1d9")
-            self.log_message("✓ Application started", "#3fb950")
-            self.log_message(f"📚 {len(self.words)} words loaded", "#58a6ff")
-            self.log_message("🎯 Press START to begin", "#f0883e")
-            self.log_message("═" * 40, "#c9d1d9")
-            self.start_keyboard_listener()
-            self.root.mainloop()
+        self.log_message("═" * 40, "#c9d1d9")
+        self.log_message("✓ Application started", "#3fb950")
+        self.log_message("⏳ Loading dictionary in background", "#58a6ff")
+        self.log_message("🎯 Press START to begin", "#f0883e")
+        self.log_message("═" * 40, "#c9d1d9")
+        self.start_keyboard_listener()
+        self.start_word_loader()
+        self.root.mainloop()
+        self.log.stop()
+        if self.recorder:
+            count = self.recorder.save(self.trace_path)
+            print(f"Saved {count} key events to {self.trace_path}")
 
 if __name__ == "__main__":
-    app = WordAutofiller()
+    parser = argparse.ArgumentParser(description="Word Autofiller Pro")
+    parser.add_argument('--connect', nargs='?', const='', default=None, metavar='ADDRESS',
+                        help="use a running completion_server.py (host:port or unix:/path)")
+    parser.add_argument('--log-file', default=None, metavar='PATH',
+                        help="also write the activity log to PATH, rotated at 1 MB")
+    parser.add_argument('--record-trace', default=None, metavar='PATH',
+                        help="save keys typed while listening to PATH on exit, for replay.py")
+    parser.add_argument('--ocr-region', type=parse_region, default=None, metavar='X,Y,W,H',
+                        help="only scan this part of the screen for letter tiles")
+    args = parser.parse_args()
+    
+    server_address = None
+    if args.connect is not None:
+        server_address = parse_address(args.connect or None)
+    
+    app = WordAutofiller(server_address, args.log_file, args.record_trace, args.ocr_region)
     app.run()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import argparse
+import sys
+import time
+
+from benchmark import generate_words, percentile
+from completion_controller import CompletionController
+from input_trace import KEY_DOWN, read_trace, replay, synthetic_trace, write_trace
+from keystrokes import RecordingBackend
+from word_index import PrefixIndex
+from word_store import load_word_store
+
+
+def replay_settings(longest_first=True, min_length=4):
+    """The app's default completion settings, with every typing delay zero"""
+    return {
+        'backspace_delay': 0,
+        'typing_delay': 0,
+        'start_delay': 0,
+        'after_delete_delay': 0,
+        'prefer_longer_words': 1.0 if longest_first else 0.0,
+        'min_word_length': min_length,
+        'strategy_mode': 0,
+        'strategy_lookahead': 0,
+        'weight_last_rarity': 0.0,
+        'weight_difficulty': 0.0,
+        'weight_frequency': 0.0,
+        'fuzzy_edits': 2,
+        'search_mode': 0,
+        'batch_typing': 0
+    }
+
+
+class ReplaySession:
+    """Drives the app's CompletionController from a recorded trace.
+
+    Every key event goes to the controller, as the keyboard hook does in
+    main.py; the controller types into a RecordingBackend that stands in
+    for the game's text field. The user's own keys are applied to that
+    field too, so backend.read() is what the field would show at the end.
+    A completion's latency runs from its INSERT event to the last key
+    sent. The configured delays pass on the backend's virtual clock, so
+    the latency does not include them.
+    When wait is set, each INSERT is handled before the next event.
+    """
+
+    def __init__(self, index, settings, wait=True):
+        self.wait = wait
+        self.backend = RecordingBackend()
+        self.pressed = {}
+        self.keystrokes = 0
+        self.completions = []
+        self.controller = CompletionController(settings, lambda: self.backend,
+                                               on_buffer=self.pressed.clear,
+                                               on_completion=self.completed, echo_wait=0)
+        self.controller.word_index = index
+        self.controller.index_ready = True
+        self.controller.listening = True
+        self.worker = self.controller.worker
+
+    def handle(self, event):
+        """Apply one recorded key event"""
+        if event.event_type == KEY_DOWN:
+            self.keystrokes += 1
+            if event.name == 'insert':
+                self.pressed.setdefault(self.controller.current_buffer, time.perf_counter())
+            else:
+                self.type_into_field(event.name)
+        self.controller.key_event(event.name, event.event_type)
+        if self.wait and event.name == 'insert' and event.event_type == KEY_DOWN:
+            self.worker.wait_idle()
+
+    def type_into_field(self, name):
+        """What the user's key does to the game's text field"""
+        if name == 'enter':
+            # The word is submitted and the field cleared
+            self.backend.prepare('')
+        elif name == 'backspace':
+            self.backend.press('backspace')
+        elif name == 'space':
+            self.backend.press(' ')
+        elif len(name) == 1:
+            self.backend.press(name.lower())
+
+    def completed(self, prefix, word, speculated):
+        started = self.pressed.pop(prefix, None)
+        if started is not None:
+            self.completions.append((prefix, word, time.perf_counter() - started, speculated))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a key trace through the completion path")
+    parser.add_argument('trace', nargs='?', help="trace recorded with main.py --record-trace "
+                                                 "(default: a synthetic session)")
+    parser.add_argument('--words', help="words.json or compiled dictionary (default: synthetic words)")
+    parser.add_argument('--dictionary-size', type=int, default=100000,
+                        help="synthetic dictionary size when --words is not given")
+    parser.add_argument('--keystrokes', type=int, default=10000, help="synthetic session length")
+    parser.add_argument('--save', metavar='PATH', help="also write the synthetic trace to PATH")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="1 for recorded timing, N for N times faster, 0 for as fast as possible")
+    parser.add_argument('--min-length', type=int, default=4)
+    parser.add_argument('--shortest', action='store_true', help="prefer shorter words")
+    parser.add_argument('--verbose', action='store_true', help="print every completion")
+    parser.add_argument('--expect', metavar='TEXT',
+                        help="fail unless the text field ends up holding TEXT")
+    args = parser.parse_args()
+
+    if args.words:
+        index = PrefixIndex(load_word_store(args.words))
+    else:
+        words = generate_words(args.dictionary_size)
+        index = PrefixIndex(words)
+    if args.trace:
+        events = read_trace(args.trace)
+    else:
+        events = synthetic_trace(index.words, args.keystrokes)
+        if args.save:
+            write_trace(args.save, events)
+
+    settings = replay_settings(not args.shortest, args.min_length)
+    session = ReplaySession(index, settings, wait=not args.speed)
+    start = time.perf_counter()
+    replay(events, session.handle, args.speed or None)
+    session.worker.wait_idle()
+    elapsed = time.perf_counter() - start
+
+    if args.verbose:
+        for prefix, word, latency, speculated in session.completions:
+            print(f"  {prefix:<8} -> {word or '-':<20} {latency * 1e6:9.1f} us{'  speculated' if speculated else ''}")
+
+    latencies = sorted(latency * 1e6 for _, word, latency, _ in session.completions if word)
+    missed = sum(1 for _, word, _, _ in session.completions if not word)
+    speculated = sum(1 for *_, hit in session.completions if hit)
+    stats = session.worker.stats()
+    print(f"{len(events):,} events, {session.keystrokes:,} keystrokes replayed in {elapsed:.2f}s "
+          f"({session.keystrokes / elapsed:,.0f} keys/s)")
+    print(f"{len(latencies):,} completions ({missed} without a word, {speculated} from speculation), "
+          f"{stats['coalesced']} coalesced, {stats['interrupted']} interrupted")
+    print(f"INSERT to last key: p50 {percentile(latencies, 0.5):.1f} us, "
+          f"p99 {percentile(latencies, 0.99):.1f} us, max {latencies[-1] if latencies else 0:.1f} us")
+    if args.expect is not None:
+        field = session.backend.read()
+        print(f"Text field: {field!r} (expected {args.expect!r})")
+        sys.exit(0 if field == args.expect else 1)
+    sys.exit(0 if latencies else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import numpy as np
+
+FEATURES = ('length', 'last_rarity', 'difficulty', 'frequency')
+
+
+class WordScorer:
+    """Ranks completions by a weighted sum of per-word feature columns.
+
+    Columns are float32 in [0, 1], one row per feature, indexed by word ID.
+    A prefix's candidates are a contiguous ID range, so scoring them is one
+    matrix-vector product over a slice plus an argpartition for the top k.
+    """
+
+    def __init__(self, index, frequencies=None):
+        self.index = index
+        store = index.words
+        count = len(store)
+        self.features = np.zeros((len(FEATURES), count), dtype=np.float32)
+        if not count:
+            return
+
+        blob = np.frombuffer(store.blob, dtype=np.uint8)
+        offsets = np.frombuffer(store.offsets, dtype=np.uint32).astype(np.int64)
+        lengths = np.frombuffer(store.lengths, dtype=np.uint8).astype(np.float32)
+        self.features[0] = lengths / lengths.max()
+
+        # Rare final letters leave the opponent few words to answer with
+        first = blob[offsets[:-1]]
+        starts = np.bincount(first, minlength=256).astype(np.float32)
+        self.features[1] = 1 - starts[blob[offsets[1:] - 1]] / starts.max()
+
+        # Mean rarity of a word's letters across the whole dictionary
+        letter_counts = np.bincount(blob, minlength=256).astype(np.float32)
+        rarity = 1 - letter_counts / letter_counts.max()
+        byte_lengths = np.diff(offsets).astype(np.float32)
+        self.features[2] = np.add.reduceat(rarity[blob], offsets[:-1]) / byte_lengths
+
+        if frequencies:
+            self.set_frequencies(frequencies)
+        elif getattr(store, 'frequencies', None) is not None:
+            # Counts compiled into words.bin
+            self.set_counts(np.frombuffer(store.frequencies, dtype=np.float32))
+
+    def set_frequencies(self, frequencies):
+        """Fill the frequency column from a {word: count} mapping"""
+        counts = np.zeros(self.features.shape[1], dtype=np.float32)
+        for word, count in frequencies.items():
+            word_id = self.index.word_id(str(word).lower())
+            if word_id is not None:
+                counts[word_id] = max(float(count), 0.0)
+        self.set_counts(counts)
+
+    def set_counts(self, counts):
+        """Fill the frequency column from word counts indexed by word ID"""
+        column = np.log1p(np.maximum(counts, 0), dtype=np.float32)
+        if column.max() > 0:
+            column /= column.max()
+        self.features[3] = column
+
+    def rank(self, lo, hi, mask, weights, k):
+        """Return up to k word IDs from [lo, hi) where mask holds, best first"""
+        scores = weights @ self.features[:, lo:hi]
+        candidates = np.flatnonzero(mask)
+        scores = scores[candidates]
+        if len(candidates) > k:
+            # Keep everything tied with the k-th best so tie-breaking stays stable
+            kth = np.partition(-scores, k - 1)[k - 1]
+            top = np.flatnonzero(-scores <= kth)
+            candidates, scores = candidates[top], scores[top]
+        # Ties keep alphabetical (ID) order
+        order = np.lexsort((candidates, -scores))
+        return candidates[order][:k] + lo
+
+    def rank_ids(self, ids, weights, k):
+        """Return up to k of the given word IDs, best first; ties keep ID order"""
+        ids = np.asarray(ids, dtype=np.int64)
+        scores = weights @ self.features[:, ids]
+        if len(ids) > k:
+            kth = np.partition(-scores, k - 1)[k - 1]
+            top = np.flatnonzero(-scores <= kth)
+            ids, scores = ids[top], scores[top]
+        return ids[np.lexsort((ids, -scores))][:k]
+
+    def eligible(self, prefix, min_length):
+        """Return (lo, hi, mask of prefix's completions with at least min_length letters)"""
+        lo, hi = self.index.prefix_range(prefix)
+        if lo < hi and self.index.words[lo] == prefix:
+            lo += 1
+        return lo, hi, np.frombuffer(self.index.words.lengths, dtype=np.uint8)[lo:hi] >= min_length
+
+    def peek(self, prefix, weights, min_length=1, count=1):
+        """Return the next count words complete() would pick, leaving them unplayed"""
+        lo, hi, eligible = self.eligible(prefix, min_length)
+        if lo >= hi:
+            return []
+        free = eligible & ~self.index.played.range_mask(lo, hi)
+        return [self.index.words[int(i)] for i in self.rank(lo, hi, free, weights, count)]
+
+    def complete(self, prefix, weights, min_length=1):
+        """Return (best unplayed completion or None, whether candidates cycled)"""
+        played = self.index.played
+        lo, hi, eligible = self.eligible(prefix, min_length)
+        if lo >= hi:
+            return None, False
+
+        free = eligible & ~played.range_mask(lo, hi)
+        cycled = False
+        if not free.any():
+            if not eligible.any():
+                return None, False
+            # Every candidate was played: release this prefix's words only
+            played.clear_ids(np.flatnonzero(eligible) + lo)
+            free = eligible
+            cycled = True
+
+        word_id = int(self.rank(lo, hi, free, weights, 1)[0])
+        played.mark(word_id)
+        return self.index.words[word_id], cycled
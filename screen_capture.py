@@ -0,0 +1,135 @@
+import time
+
+import numpy as np
+from PIL import Image, ImageGrab
+
+# Copies only the requested pixels; PIL's ImageGrab grabs the whole screen
+# on Windows and crops afterwards, so a small region saves little there
+try:
+    import mss
+except Exception:
+    mss = None
+
+
+def parse_region(text):
+    """Parse "x,y,width,height" into a (left, top, right, bottom) box"""
+    try:
+        x, y, width, height = (int(part) for part in text.split(','))
+    except ValueError:
+        raise ValueError(f"Region must be x,y,width,height, not {text!r}")
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Region {text!r} is empty")
+    return x, y, x + width, y + height
+
+
+class ScreenCapture:
+    """Grabs the screen, or one box of it, as an RGB image.
+
+    grab() returns (image, box) where box is the screen area the image
+    covers, so positions found in the image can be mapped back. mss
+    handles are per thread, so one ScreenCapture belongs to one thread.
+    """
+
+    def __init__(self):
+        self.sct = None
+
+    def grab(self, box=None):
+        if mss is None:
+            image = ImageGrab.grab(bbox=box)
+            return image, box or (0, 0) + image.size
+
+        if self.sct is None:
+            self.sct = mss.mss()
+        if box is None:
+            screen = self.sct.monitors[1]
+            box = (screen['left'], screen['top'],
+                   screen['left'] + screen['width'], screen['top'] + screen['height'])
+        left, top, right, bottom = box
+        shot = self.sct.grab({'left': left, 'top': top, 'width': right - left, 'height': bottom - top})
+        return Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX'), box
+
+
+class RegionLock:
+    """Decides which part of the screen the OCR scanner captures.
+
+    Scans cover the fixed region if one is set, otherwise the full screen.
+    With auto set, tiles found on a scan lock capture to their bounding
+    box padded by margin tile sizes (wider sideways, where words grow).
+    Every later find re-centres the box. When no tile has been seen for
+    release_after seconds, scans widen to the full area again.
+    """
+
+    def __init__(self, fixed=None, auto=True, margin=2.0, release_after=5.0):
+        self.fixed = fixed
+        self.auto = auto
+        self.margin = margin
+        self.release_after = release_after
+        self.locked = None
+        self.last_seen = None
+        self.limits = fixed
+
+    def box(self):
+        """Screen box to capture next, or None for the full screen"""
+        return (self.locked if self.auto else None) or self.fixed
+
+    def update(self, tiles, box, now=None):
+        """Record a scan of box (tile positions relative to it); return 'locked', 'released' or None"""
+        now = time.monotonic() if now is None else now
+        if self.locked is None:
+            self.limits = box
+        if not self.auto:
+            self.locked = None
+            return None
+        if tiles:
+            self.last_seen = now
+            was = self.locked
+            self.locked = self.padded(tiles, box)
+            return 'locked' if was is None else None
+        if self.locked is not None and now - self.last_seen > self.release_after:
+            self.locked = None
+            return 'released'
+        return None
+
+    def padded(self, tiles, box):
+        """Screen box around tiles, padded and kept inside the scan limits"""
+        left = box[0] + min(t['x'] for t in tiles)
+        top = box[1] + min(t['y'] for t in tiles)
+        right = box[0] + max(t['x'] + t['w'] for t in tiles)
+        bottom = box[1] + max(t['y'] + t['h'] for t in tiles)
+        size = max(max(t['w'], t['h']) for t in tiles)
+        pad_x = int(size * self.margin * 2)
+        pad_y = int(size * self.margin)
+        limit_left, limit_top, limit_right, limit_bottom = self.limits
+        return (max(limit_left, left - pad_x), max(limit_top, top - pad_y),
+                min(limit_right, right + pad_x), min(limit_bottom, bottom + pad_y))
+
+    def reset(self):
+        """Forget the lock, e.g. when the scanner restarts"""
+        self.locked = None
+        self.last_seen = None
+
+
+class FrameGate:
+    """Spots captures that look the same as the one before.
+
+    Each frame is shrunk step times to grayscale, averaging step x step
+    pixels into one, and compared with the previous frame. Averaging evens
+    out capture noise, while a letter stroke still moves its thumbnail
+    pixels by many gray levels. The frame counts as changed when any pixel
+    moved more than threshold levels.
+    """
+
+    def __init__(self, step=8, threshold=8):
+        self.step = step
+        self.threshold = threshold
+        self.previous = None
+        self.box = None
+
+    def changed(self, image, box):
+        """Whether image, captured from screen box, differs from the last frame"""
+        thumb = np.asarray(image.reduce(self.step).convert('L'), dtype=np.int16)
+        previous, self.previous = self.previous, thumb
+        moved, self.box = box != self.box, box
+        if previous is None or moved or previous.shape != thumb.shape:
+            return True
+        return bool((np.abs(thumb - previous) > self.threshold).any())
@@ -0,0 +1,66 @@
+import threading
+
+
+class Speculator:
+    """Computes results ahead of need on one background thread.
+
+    request(key, compute) supersedes whatever was asked before: a pending
+    request that has not started is dropped, and a running one is cancelled
+    in the sense that its result is discarded when it finishes. take(key)
+    returns the stored result only if it was computed for that exact key.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.token = 0
+        self.pending = None
+        self.result = None
+        self.computed = 0
+        self.discarded = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request(self, key, compute):
+        """Speculate compute() for key, replacing any earlier request"""
+        with self.lock:
+            self.token += 1
+            self.pending = (self.token, key, compute)
+            self.result = None
+            self.wakeup.notify()
+
+    def cancel(self):
+        """Drop pending and stored speculations"""
+        with self.lock:
+            self.token += 1
+            self.pending = None
+            self.result = None
+
+    def is_current(self, token):
+        """Whether a request is still the latest, so its work is still wanted"""
+        return token == self.token
+
+    def take(self, key):
+        """Return the result speculated for key, or None"""
+        with self.lock:
+            if self.result is not None and self.result[0] == key:
+                return self.result[1]
+        return None
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.pending is None:
+                    self.wakeup.wait()
+                token, key, compute = self.pending
+                self.pending = None
+            try:
+                value = compute()
+            except Exception:
+                value = None
+            with self.lock:
+                if self.is_current(token) and value is not None:
+                    self.result = (key, value)
+                    self.computed += 1
+                else:
+                    self.discarded += 1
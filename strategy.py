@@ -0,0 +1,99 @@
+import numpy as np
+
+# Letters a-z map to 0-25; anything else shares bucket 26
+OTHER = 26
+LETTER_CODES = np.full(256, OTHER, dtype=np.uint8)
+LETTER_CODES[ord('a'):ord('z') + 1] = np.arange(26, dtype=np.uint8)
+
+
+class LastLetterStrategy:
+    """Ranks completions by how few replies they leave the opponent.
+
+    In Last Letter the next player must start with our word's final letter,
+    so the tables count unplayed words per first letter and per (first, last)
+    letter pair. They follow the index's match-wide played set, so ranking a
+    prefix never rescans the dictionary.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        store = index.words
+        blob = np.frombuffer(store.blob, dtype=np.uint8)
+        offsets = np.frombuffer(store.offsets, dtype=np.uint32).astype(np.int64)
+        self.lengths = np.frombuffer(store.lengths, dtype=np.uint8)
+
+        # Words are ASCII in practice; a multi-byte first/last char lands in OTHER
+        self.first = LETTER_CODES[blob[offsets[:-1]]]
+        self.last = LETTER_CODES[blob[offsets[1:] - 1]]
+
+        self.initial_pairs = np.zeros((OTHER + 1, OTHER + 1), dtype=np.int64)
+        np.add.at(self.initial_pairs, (self.first, self.last), 1)
+        self.recount()
+        index.played.watchers.append(self.on_played)
+
+    def recount(self):
+        """Rebuild the counts from the played set"""
+        played = self.index.played.ids()
+        self.pair_counts = self.initial_pairs.copy()
+        np.subtract.at(self.pair_counts, (self.first[played], self.last[played]), 1)
+        self.start_counts = self.pair_counts.sum(axis=1)
+
+    def on_played(self, word_ids, played):
+        """Keep the counts in step with the played set"""
+        if word_ids is None:
+            self.recount()
+            return
+        delta = -1 if played else 1
+        first, last = self.first[word_ids], self.last[word_ids]
+        np.add.at(self.pair_counts, (first, last), delta)
+        np.add.at(self.start_counts, first, delta)
+
+    def reply_floor(self):
+        """For each letter, the fewest options the opponent's best reply leaves us"""
+        floors = np.where(self.pair_counts > 0, self.start_counts[np.newaxis, :], np.iinfo(np.int64).max)
+        return floors.min(axis=1)
+
+    def eligible(self, prefix, min_length):
+        """IDs of prefix's completions with at least min_length letters"""
+        lo, hi = self.index.prefix_range(prefix)
+        if lo < hi and self.index.words[lo] == prefix:
+            lo += 1
+        return np.flatnonzero(self.lengths[lo:hi] >= min_length) + lo
+
+    def ranked(self, ids, longest_first, lookahead):
+        """Order candidate IDs best first"""
+        last = self.last[ids]
+        # Playing the word removes it from the opponent's pool if it starts with its own last letter
+        options = self.start_counts[last] - (self.first[ids] == last)
+        lengths = self.lengths[ids].astype(np.int64)
+        length_key = -lengths if longest_first else lengths
+        if lookahead:
+            # Among words that starve equally, keep our own next turn roomy
+            order = np.lexsort((ids, length_key, -self.reply_floor()[last], options))
+        else:
+            order = np.lexsort((ids, length_key, options))
+        return ids[order]
+
+    def peek(self, prefix, longest_first=True, min_length=1, lookahead=False, count=1):
+        """Return the next count words complete() would pick, leaving them unplayed"""
+        ids = self.eligible(prefix, min_length)
+        ids = ids[~self.index.played.mask(ids)]
+        return [self.index.words[int(i)] for i in self.ranked(ids, longest_first, lookahead)[:count]]
+
+    def complete(self, prefix, longest_first=True, min_length=1, lookahead=False):
+        """Return (best unplayed completion or None, whether candidates cycled)"""
+        played = self.index.played
+        eligible = self.eligible(prefix, min_length)
+        ids = eligible[~played.mask(eligible)]
+        cycled = False
+        if not len(ids):
+            if not len(eligible):
+                return None, False
+            # Every candidate was played: release this prefix's words only
+            played.clear_ids(eligible)
+            ids = eligible
+            cycled = True
+
+        word_id = int(self.ranked(ids, longest_first, lookahead)[0])
+        played.mark(word_id)
+        return self.index.words[word_id], cycled
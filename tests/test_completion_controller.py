@@ -0,0 +1,152 @@
+import os
+import threading
+
+from completion_controller import CompletionController
+from input_trace import KEY_DOWN, KEY_UP, read_trace, replay
+from keystrokes import RecordingBackend
+from replay import ReplaySession, replay_settings
+from scoring import WordScorer
+from word_index import PrefixIndex
+from word_store import load_word_store
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def press(controller, *names):
+    for name in names:
+        controller.key_event(name, KEY_DOWN)
+        controller.key_event(name, KEY_UP)
+
+
+def make_controller(words, **settings):
+    backend = RecordingBackend()
+    done = []
+    controller = CompletionController(dict(replay_settings(), **settings), lambda: backend,
+                                      on_completion=lambda *args: done.append(args), echo_wait=0)
+    controller.word_index = PrefixIndex(words)
+    controller.index_ready = True
+    controller.listening = True
+    return controller, backend, done
+
+
+def test_insert_completes_the_buffer_and_clears_it():
+    controller, backend, done = make_controller(['cat', 'catalog', 'category'])
+    press(controller, 'c', 'a')
+    backend.prepare('ca')
+    press(controller, 'insert')
+    assert controller.worker.wait_idle(5)
+    assert backend.read() == 'category'
+    assert controller.current_buffer == ''
+    assert [word for _, word, _ in done] == ['category']
+
+
+def test_keys_are_ignored_unless_listening():
+    controller, _, _ = make_controller(['cat'])
+    controller.listening = False
+    press(controller, 'c')
+    assert controller.current_buffer == ''
+    controller.listening = True
+    controller.injecting = True
+    press(controller, 'c')
+    assert controller.current_buffer == ''
+
+
+def test_contains_mode_replaces_the_fragment():
+    controller, backend, _ = make_controller(['dogma', 'pragmatic'], search_mode=1)
+    press(controller, 'g', 'm')
+    backend.prepare('gm')
+    press(controller, 'insert')
+    assert controller.worker.wait_idle(5)
+    assert backend.read() == 'pragmatic'
+
+
+def test_checked_in_trace_ends_with_the_expected_field():
+    session = ReplaySession(PrefixIndex(load_word_store(os.path.join(DATA, 'words.json'))), replay_settings())
+    replay(read_trace(os.path.join(DATA, 'session.trace')), session.handle)
+    assert session.worker.wait_idle(5)
+    assert [word for _, word, _, _ in session.completions] == ['catapult', 'category', 'doghouse', 'battery']
+    assert session.backend.read() == 'battery'
+
+
+def test_marks_from_other_threads_keep_the_played_count():
+    words = [f"w{a}{b}{c}" for a in 'abcd' for b in 'abcdefgh' for c in 'abcdefgh']
+    controller, _, _ = make_controller(words)
+
+    def mark_all():
+        for word in words[::3]:
+            controller.mark_played(word)
+
+    thread = threading.Thread(target=mark_all)
+    thread.start()
+    for _ in range(200):
+        controller.find_completion('w')
+    thread.join()
+    played = controller.word_index.played
+    assert played.count == len(played.ids())
+    controller.reset_played()
+    assert played.count == 0 and not len(played.ids())
+
+
+def test_contains_mode_follows_the_scoring_weights():
+    # Without a weight the shorter word would come first
+    controller, _, _ = make_controller(['dogma', 'pragmatic'], search_mode=1,
+                                       prefer_longer_words=0.5, weight_frequency=1.0)
+    controller.scorer = WordScorer(controller.word_index, {'pragmatic': 50})
+    assert controller.peek_completions('gm')[1] == ['pragmatic', 'dogma']
+    assert controller.find_completion('gm') == 'pragmatic'
+
+
+class EchoBackend(RecordingBackend):
+    """Sends every key back through the controller, as the keyboard hook would"""
+
+    echoes = True
+
+    def __init__(self, text='', user_keys=None):
+        super().__init__(text)
+        self.controller = None
+        # Real keys the user presses after the given number of our keys
+        self.user_keys = user_keys or {}
+
+    def press(self, key):
+        super().press(key)
+        press(self.controller, key)
+        names = self.user_keys.pop(len(self.events), ())
+        if names:
+            # From the hook's thread, not the typing one
+            user = threading.Thread(target=press, args=(self.controller, *names))
+            user.start()
+            user.join()
+
+
+def echo_controller(words, backend):
+    done = []
+    controller = CompletionController(replay_settings(), lambda: backend,
+                                      on_completion=lambda *args: done.append(args), echo_wait=0)
+    controller.word_index = PrefixIndex(words)
+    controller.index_ready = True
+    controller.listening = True
+    backend.controller = controller
+    return controller, done
+
+
+def test_echoes_of_our_keys_are_ignored():
+    backend = EchoBackend('ca')
+    controller, done = echo_controller(['cat', 'category'], backend)
+    press(controller, 'c', 'a')
+    press(controller, 'insert')
+    assert controller.worker.wait_idle(5)
+    assert backend.read() == 'category'
+    assert [word for _, word, _ in done] == ['category']
+    assert controller.current_buffer == ''
+    assert not +controller.echoes
+
+
+def test_user_keys_while_typing_update_the_buffer_and_stop_typing():
+    backend = EchoBackend('ca', user_keys={2: ['z']})
+    controller, done = echo_controller(['cat', 'category'], backend)
+    press(controller, 'c', 'a')
+    press(controller, 'insert')
+    assert controller.worker.wait_idle(5)
+    assert controller.current_buffer == 'caz'
+    assert backend.read() == 'cate'
+    assert done == []
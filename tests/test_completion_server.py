@@ -0,0 +1,36 @@
+import asyncio
+import os
+import threading
+import time
+
+from completion_server import CompletionClient, CompletionServer
+from word_store import PackedWords
+
+
+def test_contains_waits_for_the_index_built_at_start(tmp_path):
+    server = CompletionServer(PackedWords(['dogma', 'pragmatic', 'magma', 'cat']))
+    path = str(tmp_path / 'server.sock')
+    stop = threading.Event()
+
+    async def serve_until_stopped():
+        serving = asyncio.create_task(server.serve(path))
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+
+    thread = threading.Thread(target=asyncio.run, args=(serve_until_stopped(),))
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    client = CompletionClient(path)
+    try:
+        assert client.contains('gma', min_length=4) == ('pragmatic', False)
+        assert client.contains('gma', min_length=4) == ('dogma', False)
+        assert client.complete('c') == ('cat', False)
+        assert client.stats()['memory']['infix'] > 0
+    finally:
+        client.close()
+        stop.set()
+        thread.join(5)
@@ -0,0 +1,87 @@
+import threading
+
+from completion_worker import CompletionWorker
+
+
+def test_jobs_run_in_order():
+    seen = []
+    worker = CompletionWorker(lambda key, cancelled: seen.append(key))
+    for key in 'abc':
+        worker.submit(key)
+    assert worker.wait_idle(5)
+    assert seen == ['a', 'b', 'c']
+    assert worker.stats()['completed'] == 3
+
+
+def test_duplicates_coalesce_and_full_queue_drops_oldest():
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def handler(key, cancelled):
+        started.set()
+        release.wait(5)
+        seen.append(key)
+
+    worker = CompletionWorker(handler, capacity=2)
+    worker.submit('running')
+    assert started.wait(5)
+    assert not worker.submit('running')
+    assert worker.submit('a')
+    assert not worker.submit('a')
+    assert worker.submit('b')
+    assert worker.submit('c')
+    release.set()
+    assert worker.wait_idle(5)
+    assert seen == ['running', 'b', 'c']
+    stats = worker.stats()
+    assert (stats['coalesced'], stats['dropped']) == (2, 1)
+
+
+def test_cancel_interrupts_the_running_job_and_clears_the_queue():
+    started = threading.Event()
+    seen = []
+
+    def handler(key, cancelled):
+        seen.append(key)
+        started.set()
+        assert cancelled.wait(5)
+
+    worker = CompletionWorker(handler)
+    worker.submit('a')
+    assert started.wait(5)
+    worker.submit('b')
+    worker.cancel()
+    assert worker.wait_idle(5)
+    assert seen == ['a']
+    assert worker.stats()['interrupted'] == 1
+
+
+def test_cancel_from_the_job_itself_is_ignored():
+    results = []
+
+    def handler(key, cancelled):
+        worker.cancel()
+        results.append(cancelled.is_set())
+
+    worker = CompletionWorker(handler)
+    worker.submit('a')
+    assert worker.wait_idle(5)
+    assert results == [False]
+
+
+def test_failing_job_is_counted_and_the_worker_goes_on(capsys):
+    seen = []
+
+    def handler(key, cancelled):
+        if key == 'bad':
+            raise RuntimeError("boom")
+        seen.append(key)
+
+    worker = CompletionWorker(handler)
+    worker.submit('bad')
+    worker.submit('good')
+    assert worker.wait_idle(5)
+    assert seen == ['good']
+    assert worker.stats()['failed'] == 1
+    assert 'boom' in capsys.readouterr().err
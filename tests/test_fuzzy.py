@@ -0,0 +1,31 @@
+from fuzzy import FuzzyMatcher
+from word_index import PrefixIndex
+
+WORDS = ['ample', 'apple', 'bread', 'orange', 'order']
+
+
+def test_ocr_confusions_are_cheap():
+    fuzzy = FuzzyMatcher(PrefixIndex(WORDS))
+    assert fuzzy.corrections('qr') == [(0.3, 'or'), (1.0, 'br')]
+    assert fuzzy.corrections('appie') == [(0.3, 'apple')]
+
+
+def test_every_correction_starts_a_word():
+    index = PrefixIndex(WORDS)
+    fuzzy = FuzzyMatcher(index)
+    for edits, prefix in fuzzy.corrections('ordr', max_edits=2):
+        assert edits <= 2
+        lo, hi = index.prefix_range(prefix)
+        assert lo < hi
+
+
+def test_budget_and_limits():
+    fuzzy = FuzzyMatcher(PrefixIndex(WORDS))
+    # A single letter is never rewritten, and nothing here is within two edits
+    assert fuzzy.corrections('q') == []
+    assert fuzzy.corrections('xyz') == []
+    assert len(fuzzy.corrections('or', limit=2)) == 2
+
+
+def test_empty_dictionary():
+    assert FuzzyMatcher(PrefixIndex([])).corrections('abc') == []
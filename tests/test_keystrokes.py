@@ -0,0 +1,61 @@
+import threading
+
+from keystrokes import RecordingBackend, plan_edit, send_edit
+
+NO_DELAYS = {'start_delay': 0, 'backspace_delay': 0, 'after_delete_delay': 0, 'typing_delay': 0}
+DELAYS = {'start_delay': 0.3, 'backspace_delay': 0.1, 'after_delete_delay': 0.2, 'typing_delay': 0.05}
+
+
+def test_plan_edit_keeps_the_common_start():
+    assert plan_edit('car', 'carpet') == (0, 'pet')
+    assert plan_edit('cqr', 'carpet') == (2, 'arpet')
+    assert plan_edit('', 'dog') == (0, 'dog')
+
+
+def test_plan_edit_edge_cases():
+    assert plan_edit('carpet', 'carpet') == (0, '')
+    assert plan_edit('CAR', 'carpet') == (0, 'pet')
+    assert plan_edit('dog', 'cat') == (3, 'cat')
+    assert plan_edit('carpet', 'car') == (3, '')
+    assert plan_edit('ing', 'singing') == (3, 'singing')
+
+
+def test_send_edit_types_the_target():
+    backend = RecordingBackend('cqr')
+    assert send_edit(backend, 'cqr', 'carpet', DELAYS) == (2, 'arpet')
+    assert backend.read() == 'carpet'
+    assert [key for _, key in backend.events] == ['backspace', 'backspace', 'a', 'r', 'p', 'e', 't']
+    # Start, two backspaces, the pause after deleting, then five letters
+    assert abs(backend.clock - (0.3 + 2 * 0.1 + 0.2 + 5 * 0.05)) < 1e-9
+
+
+def test_send_edit_batch_skips_per_key_delays():
+    backend = RecordingBackend('ca')
+    send_edit(backend, 'ca', 'cat', DELAYS, batch=True)
+    assert backend.read() == 'cat'
+    assert abs(backend.clock - 0.3) < 1e-9
+
+
+def test_send_edit_stops_when_cancelled():
+    cancelled = threading.Event()
+
+    class CancellingBackend(RecordingBackend):
+        def type_text(self, text, delay):
+            super().type_text(text, delay)
+            if len(self.text) >= 4:
+                cancelled.set()
+
+    backend = CancellingBackend('ca')
+    assert send_edit(backend, 'ca', 'carpet', NO_DELAYS, cancelled=cancelled) == (0, 'rp')
+    assert backend.read() == 'carp'
+
+    backend = RecordingBackend('ca')
+    assert send_edit(backend, 'ca', 'dog', NO_DELAYS, cancelled=cancelled) == (0, '')
+    assert backend.read() == 'ca'
+
+
+def test_recording_backend_drops_keys_that_come_too_fast():
+    backend = RecordingBackend(min_gap=0.1)
+    send_edit(backend, '', 'abcd', dict(NO_DELAYS, typing_delay=0.05))
+    assert backend.read() == 'ac'
+    assert backend.dropped == 2
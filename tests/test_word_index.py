@@ -0,0 +1,98 @@
+from word_index import PrefixIndex, prefix_successor
+
+WORDS = ['car', 'card', 'care', 'cargo', 'carpet', 'cat', 'dog']
+
+
+def test_prefix_successor():
+    assert prefix_successor('ca') == 'cb'
+    assert prefix_successor('a') == 'b'
+
+
+def test_complete_prefers_length_then_alphabet():
+    index = PrefixIndex(WORDS)
+    assert index.complete('car') == ('carpet', False)
+    assert index.complete('car') == ('cargo', False)
+    assert index.complete('car') == ('card', False)
+    assert index.complete('car') == ('care', False)
+
+
+def test_complete_shortest_first():
+    index = PrefixIndex(WORDS)
+    assert index.complete('car', longest_first=False) == ('card', False)
+    assert index.complete('car', longest_first=False) == ('care', False)
+
+
+def test_prefix_itself_and_short_words_are_skipped():
+    index = PrefixIndex(WORDS)
+    assert index.complete('car', min_length=5) == ('carpet', False)
+    assert index.complete('car', min_length=5) == ('cargo', False)
+    assert index.complete('carpet') == (None, False)
+    assert index.complete('x') == (None, False)
+
+
+def test_rotation_wraps_after_every_candidate_is_played():
+    index = PrefixIndex(WORDS)
+    picks = [index.complete('car', min_length=5)[0] for _ in range(2)]
+    assert picks == ['carpet', 'cargo']
+    assert index.complete('car', min_length=5) == ('carpet', True)
+    assert index.complete('car', min_length=5) == ('cargo', False)
+
+
+def test_wrap_only_releases_that_prefix():
+    index = PrefixIndex(WORDS)
+    index.mark_played_word('dog')
+    index.complete('cat')
+    assert index.complete('ca', min_length=5) == ('carpet', False)
+    assert index.complete('ca', min_length=5) == ('cargo', False)
+    assert index.complete('ca', min_length=5) == ('carpet', True)
+    assert index.used('d') == ['dog']
+
+
+def test_played_words_are_skipped_and_peek_does_not_mark():
+    index = PrefixIndex(WORDS)
+    assert index.mark_played_word('carpet')
+    assert not index.mark_played_word('carpet')
+    assert not index.mark_played_word('unknown')
+    assert index.peek('car', count=2) == ['cargo', 'card']
+    assert index.peek('car', count=2) == ['cargo', 'card']
+    assert index.complete('car') == ('cargo', False)
+    assert index.used('car') == ['cargo', 'carpet']
+
+
+def test_reset_prefix_and_whole_match():
+    index = PrefixIndex(WORDS)
+    index.mark_played_word('carpet')
+    index.mark_played_word('dog')
+    index.reset('car')
+    assert index.used('car') == []
+    assert index.used('d') == ['dog']
+
+    generation = index.played.generation
+    index.reset()
+    assert len(index.played) == 0
+    assert index.played.generation != generation
+    assert index.complete('car') == ('carpet', False)
+
+
+def test_rebuilt_keeps_played_words_still_in_the_store():
+    index = PrefixIndex(WORDS)
+    index.complete('car')
+    index.mark_played_word('dog')
+    index.mark_played_word('cat')
+
+    rebuilt = index.rebuilt(['car', 'cargo', 'carpet', 'cat', 'cattle'])
+    assert sorted(rebuilt.used('')) == ['carpet', 'cat']
+    assert rebuilt.complete('car') == ('cargo', False)
+    assert rebuilt.complete('ca') == ('cattle', False)
+    # The old index is untouched
+    assert len(index.played) == 3
+
+
+def test_ranked_cache_is_bounded_and_evicted_prefixes_resume():
+    index = PrefixIndex(['cat', 'cater', 'catalog', 'dog', 'doge', 'dogma'], max_ranked=1)
+    assert index.complete('cat')[0] == 'catalog'
+    assert index.complete('dog')[0] == 'dogma'
+    assert list(index.ranked_cache) == ['dog']
+    # Re-ranked from the start, still skipping what was played
+    assert index.complete('cat')[0] == 'cater'
+    assert index.memory_usage()['ranked'] == index.ranked('cat').memory_usage()
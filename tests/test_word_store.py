@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from scoring import WordScorer
+from word_index import PrefixIndex
+from word_store import (CompiledDictionary, PackedWords, compile_dictionary, diff_words,
+                        normalize_words, read_dictionary_json)
+
+
+def test_normalize_words_lowercases_dedupes_and_sorts():
+    assert normalize_words(['Pear', 'apple', 'pear', '', None, 'APPLE', 'fig']) == ['apple', 'fig', 'pear']
+
+
+def test_packed_words_round_trip():
+    store = PackedWords(['cherry', 'Apple', 'banana', 'apple'])
+    assert len(store) == 3
+    assert list(store) == ['apple', 'banana', 'cherry']
+    assert store[-1] == 'cherry'
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_packed_words_trusts_normalized_input():
+    words = normalize_words(['b', 'a', 'c'])
+    assert list(PackedWords(words[::2], normalized=True)) == ['a', 'c']
+
+
+def test_bucket_spans_words_with_first_byte():
+    store = PackedWords(['apple', 'avocado', 'banana', 'cherry'])
+    assert store.bucket('a') == (0, 2)
+    assert store.bucket('b') == (2, 3)
+    assert store.bucket('z') == (4, 4)
+
+
+def test_compiled_dictionary_matches_packed_words(tmp_path):
+    words = ['zebra', 'Apple', 'mango', 'kiwi', 'apple', 'café']
+    json_path = tmp_path / 'words.json'
+    bin_path = tmp_path / 'words.bin'
+    json_path.write_text(json.dumps({'words': words}), encoding='utf-8')
+    compile_dictionary(str(json_path), str(bin_path))
+
+    compiled = CompiledDictionary(str(bin_path))
+    try:
+        packed = PackedWords(words)
+        assert list(compiled) == list(packed)
+        assert compiled.node_count == packed.node_count
+        assert compiled.bucket('k') == packed.bucket('k')
+    finally:
+        compiled.close()
+
+
+def test_compiled_dictionary_keeps_frequencies(tmp_path):
+    json_path = tmp_path / 'words.json'
+    bin_path = tmp_path / 'words.bin'
+    json_path.write_text(json.dumps({'words': ['pear', 'Apple', 'fig'],
+                                     'frequencies': {'APPLE': 30, 'fig': 2, 'missing': 9}}),
+                         encoding='utf-8')
+    compile_dictionary(str(json_path), str(bin_path))
+
+    compiled = CompiledDictionary(str(bin_path))
+    try:
+        assert list(compiled) == ['apple', 'fig', 'pear']
+        assert list(compiled.frequencies) == [30.0, 2.0, 0.0]
+        # The scorer reads them from the store when no mapping is passed
+        from_bin = WordScorer(PrefixIndex(compiled)).features[3]
+        packed = PrefixIndex(PackedWords(['pear', 'apple', 'fig']))
+        from_json = WordScorer(packed, {'apple': 30, 'fig': 2}).features[3]
+        assert from_bin.tolist() == from_json.tolist()
+    finally:
+        compiled.close()
+
+    json_path.write_text(json.dumps(['pear', 'fig']), encoding='utf-8')
+    compile_dictionary(str(json_path), str(bin_path))
+    compiled = CompiledDictionary(str(bin_path))
+    try:
+        assert compiled.frequencies is None
+        assert list(compiled) == ['fig', 'pear']
+    finally:
+        compiled.close()
+
+
+def test_compiled_dictionary_rejects_other_files(tmp_path):
+    path = tmp_path / 'words.bin'
+    path.write_bytes(b'not a dictionary at all')
+    with pytest.raises(ValueError):
+        CompiledDictionary(str(path))
+
+
+def test_read_dictionary_json_formats(tmp_path):
+    path = tmp_path / 'words.json'
+    path.write_text(json.dumps(['a', 'b']), encoding='utf-8')
+    assert read_dictionary_json(str(path)) == (['a', 'b'], {})
+
+    path.write_text(json.dumps({'words': ['a'], 'frequencies': {'a': 3}}), encoding='utf-8')
+    assert read_dictionary_json(str(path)) == (['a'], {'a': 3})
+
+    path.write_text(json.dumps({'other': []}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_dictionary_json(str(path))
+
+
+def test_diff_words():
+    assert diff_words(['a', 'b', 'c'], ['b', 'd', 'c']) == (['d'], ['a'])
@@ -0,0 +1,39 @@
+from word_index import PrefixIndex
+from word_table import WordTable, letter_bits
+
+WORDS = ['apple', 'banana', 'band', 'bandana', 'cab', "can't", 'cherry', 'zebra']
+
+
+def test_letter_bits():
+    assert letter_bits('ab') == 0b11
+    assert letter_bits("A-z'") == 1 | 1 << 25
+
+
+def test_constraints():
+    table = WordTable(WORDS)
+    assert table.query(starts_with='ban') == ['bandana', 'banana', 'band']
+    assert table.query(ends_with='a') == ['bandana', 'banana', 'zebra']
+    assert table.query(min_length=6, max_length=6) == ['banana', 'cherry']
+    assert table.query(include='bz') == ['zebra']
+    assert table.query(starts_with='b', exclude='d') == ['banana']
+
+
+def test_order_and_limit():
+    table = WordTable(WORDS)
+    assert table.query(starts_with='c', longest_first=False) == ['cab', "can't", 'cherry']
+    assert table.query(starts_with='c', limit=1) == ['cherry']
+
+
+def test_ends_with_non_letters():
+    table = WordTable(WORDS)
+    assert table.query(ends_with="'t") == ["can't"]
+    assert table.query(ends_with='t') == ["can't"]
+    assert table.query(ends_with="'") == []
+
+
+def test_played_words_are_excluded():
+    index = PrefixIndex(WORDS)
+    table = WordTable(index)
+    index.mark_played_word('banana')
+    assert table.query(starts_with='ban', played=index.played) == ['bandana', 'band']
+    assert table.query(starts_with='ban') == ['bandana', 'banana', 'band']
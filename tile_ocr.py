@@ -0,0 +1,166 @@
+import numpy as np
+from PIL import Image, ImageFilter
+
+try:
+    import pytesseract
+except Exception:
+    pytesseract = None
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# One text line; no dictionaries, so separate letters are never "corrected" into words
+STRIP_CONFIG = ('--psm 7 -c load_system_dawg=0 -c load_freq_dawg=0 '
+                f'-c tessedit_char_whitelist={LETTERS}')
+# Letters a tile font may draw nearly alike, e.g. F is an E without its foot
+LOOK_ALIKES = ('BEFP', 'BPR', 'CDGOQ', 'IJLT', 'HMNW', 'UVY', 'KX', 'SZ')
+RIVALS = {letter: frozenset(''.join(group for group in LOOK_ALIKES if letter in group)) - {letter}
+          for letter in LETTERS}
+
+
+def normalize_tile(image, size=48, inset=0.12):
+    """Grayscale tile with its border trimmed, scaled to size x size"""
+    width, height = image.size
+    dx, dy = int(width * inset), int(height * inset)
+    return image.convert('L').crop((dx, dy, width - dx, height - dy)).resize((size, size), Image.LANCZOS)
+
+
+def tile_strip(tiles):
+    """Paste normalized tiles left to right on white; return (strip, slot width).
+
+    Each tile sits centred in its own slot, a tile's width clear of the
+    next, so Tesseract sees well separated letters on one line.
+    """
+    size = tiles[0].size[1]
+    slot = size * 2
+    strip = Image.new('L', (slot * len(tiles), size * 2), 255)
+    for i, tile in enumerate(tiles):
+        strip.paste(tile, (i * slot + size // 2, size // 2))
+    return strip, slot
+
+
+def read_tiles(tiles):
+    """(letter, confidence 0-100) per normalized tile from one Tesseract run.
+
+    Recognized words are mapped back to tiles by which slot their box
+    centre falls in; a slot with nothing, several words or a word longer
+    than one letter stays unread as ('', 0).
+    """
+    if not tiles:
+        return []
+    strip, slot = tile_strip(tiles)
+    data = pytesseract.image_to_data(strip, config=STRIP_CONFIG, output_type=pytesseract.Output.DICT)
+    found = [[] for _ in tiles]
+    for text, conf, left, width in zip(data['text'], data['conf'], data['left'], data['width']):
+        text = text.strip()
+        if not text:
+            continue
+        i = (left + width // 2) // slot
+        if 0 <= i < len(tiles):
+            found[i].append((text.upper(), float(conf)))
+    return [reads[0] if len(reads) == 1 and len(reads[0][0]) == 1 and reads[0][0].isalpha() else ('', 0.0)
+            for reads in found]
+
+
+def tile_features(tile, size=16, threshold=96, blur=2):
+    """Zero-mean, unit-length ink vector of a normalized tile.
+
+    The letter is cut out by the square around its ink's bounding box
+    first, so small shifts of the tile crop don't move it, then blurred
+    so strokes a pixel apart still overlap.
+    """
+    ink = 255 - np.asarray(tile, dtype=np.uint8)
+    rows = np.flatnonzero(ink.max(axis=1) > threshold)
+    cols = np.flatnonzero(ink.max(axis=0) > threshold)
+    if len(rows) and len(cols):
+        half = max(rows[-1] - rows[0], cols[-1] - cols[0]) // 2 + 2
+        cy, cx = (rows[0] + rows[-1]) // 2, (cols[0] + cols[-1]) // 2
+        padded = np.pad(ink, half)
+        ink = padded[cy:cy + 2 * half, cx:cx + 2 * half]
+    letter = Image.fromarray(ink).filter(ImageFilter.GaussianBlur(blur))
+    ink = np.asarray(letter.resize((size, size), Image.BILINEAR), dtype=np.float32).ravel()
+    ink -= ink.mean()
+    norm = np.linalg.norm(ink)
+    return ink / norm if norm > 1e-6 else ink
+
+
+class TileClassifier:
+    """Nearest-template letter recognizer for one game's tile font.
+
+    Templates are feature vectors of tiles whose letter is known, learned
+    from confident Tesseract reads or loaded from a saved set. A tile is
+    scored against every template by normalized correlation, a single
+    matrix product for a whole frame. A match is accepted only if it
+    scores at least min_score and beats the best other letter by margin;
+    anything less is left to Tesseract. Until every look-alike of the
+    best letter has templates too, there may be no rival to beat, so the
+    match needs strict_score instead.
+    """
+
+    def __init__(self, min_score=0.9, margin=0.08, per_letter=8, strict_score=0.97):
+        self.min_score = min_score
+        self.margin = margin
+        self.per_letter = per_letter
+        self.strict_score = strict_score
+        self.templates = np.zeros((0, 256), dtype=np.float32)
+        self.labels = np.zeros(0, dtype='<U1')
+        self.unsaved = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def classify(self, tiles):
+        """Letter per normalized tile, or None where the match is not confident"""
+        if not len(self.labels) or not tiles:
+            return [None] * len(tiles)
+        features = np.stack([tile_features(tile) for tile in tiles])
+        scores = features @ self.templates.T
+        known = set(self.labels.tolist())
+        letters = []
+        for row in scores:
+            best = int(np.argmax(row))
+            letter = str(self.labels[best])
+            others = row[self.labels != letter]
+            runner_up = others.max() if len(others) else -1.0
+            needed = self.min_score if RIVALS[letter] <= known else self.strict_score
+            if row[best] >= needed and row[best] - runner_up >= self.margin:
+                letters.append(letter)
+            else:
+                letters.append(None)
+        return letters
+
+    def learn(self, tile, letter):
+        """Keep tile as a template for letter unless one just like it exists"""
+        letter = letter.upper()
+        if letter not in LETTERS:
+            return False
+        features = tile_features(tile)
+        same = self.templates[self.labels == letter]
+        if len(same) >= self.per_letter or (len(same) and (same @ features).max() > 0.98):
+            return False
+        self.templates = np.vstack([self.templates, features[np.newaxis]])
+        self.labels = np.append(self.labels, letter)
+        self.unsaved += 1
+        return True
+
+    def correct(self, tile, letter):
+        """Drop other letters' templates that match tile, then learn it as letter.
+
+        For a tile the templates read wrong, e.g. when Tesseract disagrees;
+        returns how many templates were dropped.
+        """
+        letter = letter.upper()
+        wrong = (self.templates @ tile_features(tile) >= self.min_score) & (self.labels != letter)
+        if wrong.any():
+            self.templates = self.templates[~wrong]
+            self.labels = self.labels[~wrong]
+            self.unsaved += 1
+        self.learn(tile, letter)
+        return int(wrong.sum())
+
+    def save(self, path):
+        np.savez_compressed(path, templates=self.templates, labels=self.labels)
+        self.unsaved = 0
+
+    def load(self, path):
+        with np.load(path) as data:
+            self.templates = data['templates'].astype(np.float32)
+            self.labels = data['labels'].astype('<U1')
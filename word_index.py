@@ -0,0 +1,296 @@
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+from word_store import PackedWords
+
+
+def prefix_successor(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PlayedWords:
+    """Match-wide set of played word IDs, one bit per word.
+
+    Watchers are called as watcher(word_ids, played) on every change, with
+    word_ids None when the whole set is cleared. generation moves whenever
+    bits are cleared so cursors know earlier words may be free again.
+    """
+
+    SCAN_CHUNK = 256
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+        self.generation = 0
+        self.watchers = []
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, word_id):
+        return bool((self.bits[word_id >> 3] >> (word_id & 7)) & 1)
+
+    def mark(self, word_id):
+        """Mark one word played; return False if it already was"""
+        if word_id in self:
+            return False
+        self.bits[word_id >> 3] |= 1 << (word_id & 7)
+        self.count += 1
+        for watcher in self.watchers:
+            watcher(word_id, True)
+        return True
+
+    def mask(self, ids):
+        """Played flags for an array of word IDs"""
+        return ((self.bits[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def range_mask(self, lo, hi):
+        """Played flags for the ID range [lo, hi)"""
+        bits = np.unpackbits(self.bits[lo >> 3:(hi + 7) >> 3], bitorder='little')
+        start = lo & 7
+        return bits[start:start + hi - lo].astype(bool)
+
+    def first_free(self, ids, lo, hi):
+        """Index of the first unplayed ID in ids[lo:hi], or None"""
+        if lo < hi and int(ids[lo]) not in self:
+            return lo
+        while lo < hi:
+            free = np.flatnonzero(~self.mask(ids[lo:min(hi, lo + self.SCAN_CHUNK)]))
+            if len(free):
+                return lo + int(free[0])
+            lo += self.SCAN_CHUNK
+        return None
+
+    def clear_ids(self, ids):
+        """Unmark an array of word IDs"""
+        ids = ids[self.mask(ids)]
+        if not len(ids):
+            return
+        np.bitwise_and.at(self.bits, ids >> 3, ~(np.uint8(1) << (ids & 7).astype(np.uint8)))
+        self.count -= len(ids)
+        self.generation += 1
+        for watcher in self.watchers:
+            watcher(ids, False)
+
+    def clear(self):
+        """Unmark every word, e.g. at match start"""
+        self.bits[:] = 0
+        self.count = 0
+        self.generation += 1
+        for watcher in self.watchers:
+            watcher(None, False)
+
+    def ids(self):
+        """Array of every played word ID"""
+        return np.flatnonzero(np.unpackbits(self.bits, bitorder='little')[:self.size])
+
+
+class RankedCandidates:
+    """Completions of one prefix, pre-sorted, with a scan cursor.
+
+    Holds word IDs rather than strings. Words are grouped by length, so the
+    minimum-length filter is a search over the length keys at query time
+    rather than part of the index. Every ID before the cursor is played,
+    so each pick resumes where the last one stopped.
+    """
+
+    __slots__ = ('store', 'ids', 'keys', 'longest_first', 'position', 'wrapped',
+                 'min_length', 'start', 'stop', 'generation')
+
+    def __init__(self, store, ids, longest_first):
+        self.store = store
+        self.ids = ids
+        # Keys ascend in list order whichever way lengths are ranked
+        sign = -1 if longest_first else 1
+        self.keys = np.frombuffer(store.lengths, dtype=np.uint8)[ids].astype(np.int16) * sign
+        self.longest_first = longest_first
+        self.position = 0
+        self.wrapped = False
+        self.min_length = None
+        self.start = self.stop = 0
+        self.generation = None
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def set_min_length(self, min_length):
+        """Narrow the window to words of at least min_length letters"""
+        if min_length == self.min_length:
+            return
+        start = self.start
+        if self.longest_first:
+            self.start = 0
+            self.stop = int(np.searchsorted(self.keys, -min_length, side='right'))
+        else:
+            self.start = int(np.searchsorted(self.keys, min_length, side='left'))
+            self.stop = len(self.ids)
+        self.min_length = min_length
+        # Words that just entered the window have not been scanned yet
+        if self.start < start or self.position < self.start:
+            self.position = self.start
+
+    def next(self, played, min_length=1):
+        """Return the best unplayed candidate and mark it played.
+
+        When every candidate is played, they are all released again and the
+        rotation starts over (wrapped is set).
+        """
+        self.set_min_length(min_length)
+        if self.start >= self.stop:
+            self.wrapped = False
+            return None
+        if self.generation != played.generation:
+            self.position = self.start
+
+        i = played.first_free(self.ids, self.position, self.stop)
+        self.wrapped = i is None
+        if self.wrapped:
+            played.clear_ids(self.ids[self.start:self.stop])
+            i = self.start
+        self.generation = played.generation
+
+        word_id = int(self.ids[i])
+        played.mark(word_id)
+        self.position = i + 1
+        return self.store[word_id]
+
+    def peek(self, played, min_length=1, count=1):
+        """Return the next count candidates next() would pick, without picking them"""
+        self.set_min_length(min_length)
+        position = self.position if self.generation == played.generation else self.start
+        words = []
+        while len(words) < count:
+            i = played.first_free(self.ids, position, self.stop)
+            if i is None:
+                break
+            words.append(self.store[int(self.ids[i])])
+            position = i + 1
+        return words
+
+    def memory_usage(self):
+        """Return bytes held by the ID and key arrays"""
+        return self.ids.nbytes + self.keys.nbytes
+
+
+class PrefixIndex:
+    """Implicit trie over a sorted, deduplicated word store.
+
+    In sorted order every prefix's subtree is one contiguous run of word IDs,
+    so jumping to it is two bisects - no per-node objects, no key scans.
+    The store's first-byte fanout table narrows the bisects. The store may be
+    a memory-mapped CompiledDictionary. Ranked candidates are kept for the
+    max_ranked most recently used prefixes; an evicted prefix is re-ranked
+    with its cursor at the start, which every played word still satisfies.
+    """
+
+    def __init__(self, words, max_ranked=256):
+        self.words = words if isinstance(words, PackedWords) else PackedWords(words)
+        self.node_count = self.words.node_count
+        self.played = PlayedWords(len(self.words))
+        self.max_ranked = max_ranked
+        self.ranked_cache = OrderedDict()
+        self.ranked_bytes = 0
+
+    def __len__(self):
+        return len(self.words)
+
+    def prefix_range(self, prefix):
+        """Return the (lo, hi) ID range of the words starting with prefix"""
+        if not prefix:
+            return 0, len(self.words)
+        lo, hi = self.words.bucket(prefix)
+        lo = bisect_left(self.words, prefix, lo, hi)
+        hi = bisect_left(self.words, prefix_successor(prefix), lo, hi)
+        return lo, hi
+
+    def iter_prefix(self, prefix):
+        """Yield words starting with prefix in sorted order"""
+        lo, hi = self.prefix_range(prefix)
+        for i in range(lo, hi):
+            yield self.words[i]
+
+    def word_id(self, word):
+        """Return the ID of word, or None if it is not in the store"""
+        lo, hi = self.prefix_range(word)
+        if lo < hi and self.words[lo] == word:
+            return lo
+        return None
+
+    def ranked(self, prefix, longest_first=True):
+        """Return the cached, length-sorted completions for prefix"""
+        candidates = self.ranked_cache.get(prefix)
+        if candidates is not None and candidates.longest_first == longest_first:
+            self.ranked_cache.move_to_end(prefix)
+        else:
+            lo, hi = self.prefix_range(prefix)
+            # The prefix itself sorts first in its range
+            if lo < hi and self.words[lo] == prefix:
+                lo += 1
+            lengths = np.frombuffer(self.words.lengths, dtype=np.uint8)[lo:hi]
+            # Stable sort keeps alphabetical order within each length
+            order = np.argsort(-lengths.astype(np.int16) if longest_first else lengths, kind='stable')
+            ids = (order + lo).astype(np.uint32)
+            candidates = RankedCandidates(self.words, ids, longest_first)
+            self.cache_ranked(prefix, candidates)
+        return candidates
+
+    def cache_ranked(self, prefix, candidates):
+        """Keep candidates for prefix, evicting the least recently used past max_ranked"""
+        old = self.ranked_cache.pop(prefix, None)
+        if old is not None:
+            self.ranked_bytes -= old.memory_usage()
+        self.ranked_cache[prefix] = candidates
+        self.ranked_bytes += candidates.memory_usage()
+        while len(self.ranked_cache) > self.max_ranked:
+            _, evicted = self.ranked_cache.popitem(last=False)
+            self.ranked_bytes -= evicted.memory_usage()
+
+    def complete(self, prefix, longest_first=True, min_length=1):
+        """Return (next completion or None, whether the rotation wrapped)"""
+        candidates = self.ranked(prefix, longest_first)
+        word = candidates.next(self.played, min_length)
+        return word, candidates.wrapped
+
+    def peek(self, prefix, longest_first=True, min_length=1, count=1):
+        """Return the next count completions complete() would pick, leaving them unplayed"""
+        return self.ranked(prefix, longest_first).peek(self.played, min_length, count)
+
+    def mark_played_word(self, word):
+        """Mark a word played this match (ours or an opponent's)"""
+        word_id = self.word_id(word)
+        return word_id is not None and self.played.mark(word_id)
+
+    def used(self, prefix):
+        """Return the played completions of prefix"""
+        lo, hi = self.prefix_range(prefix)
+        if lo < hi and self.words[lo] == prefix:
+            lo += 1
+        return [self.words[int(i)] for i in np.flatnonzero(self.played.range_mask(lo, hi)) + lo]
+
+    def reset(self, prefix=None):
+        """Release played words of prefix, or of the whole match"""
+        if prefix is None:
+            self.played.clear()
+        else:
+            lo, hi = self.prefix_range(prefix)
+            self.played.clear_ids(np.arange(lo, hi, dtype=np.int64))
+
+    def rebuilt(self, words):
+        """Return an index over words that keeps this match's played words"""
+        return self.carry_played(PrefixIndex(words))
+
+    def carry_played(self, index):
+        """Mark this match's played words in index, one over another store; return index"""
+        for word_id in self.played.ids():
+            index.mark_played_word(self.words[int(word_id)])
+        return index
+
+    def memory_usage(self):
+        """Return {'store', 'mapped', 'ranked'} byte counts"""
+        store, mapped = self.words.memory_usage()
+        store += self.played.bits.nbytes
+        return {'store': store, 'mapped': mapped, 'ranked': self.ranked_bytes}
@@ -0,0 +1,264 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate
+
+# Compiled dictionary layout (little-endian):
+#   header | offsets: u32 * (count + 1) | fanout: u32 * 257
+#   | frequencies: f32 * count (only if words.json had any) | lengths: u8 * count
+#   | blob: utf-8 words
+# Words are lowercased, deduplicated and sorted, so UTF-8 byte order matches
+# str order and a prefix's words form one contiguous run. A word's ID is its
+# position in that order. fanout[b] is the ID of the first word whose first
+# byte is >= b; lengths holds each word's letter count (capped at 255).
+# frequencies holds each word's count from words.json, 0 where it had none;
+# its position in the header is 0 when the table is left out.
+MAGIC = b'WAFD'
+VERSION = 3
+HEADER = struct.Struct('<4sIIIQQQQQ')
+FANOUT_SIZE = 257
+
+
+def normalize_words(words):
+    """Lowercase, deduplicate and sort a raw word list"""
+    return sorted({word.lower() for word in words if isinstance(word, str) and word})
+
+
+def count_nodes(sorted_words):
+    """Count trie nodes (unique prefixes) from shared prefixes of neighbours"""
+    count = 0
+    prev = ""
+    for word in sorted_words:
+        common = 0
+        limit = min(len(prev), len(word))
+        while common < limit and prev[common] == word[common]:
+            common += 1
+        count += len(word) - common
+        prev = word
+    return count
+
+
+def read_dictionary_json(path):
+    """Read words.json, returning (words, {word: frequency})
+
+    Accepts a plain list or {"words": [...]}, optionally with a
+    "frequencies" mapping alongside the words.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'words' in data:
+        return data['words'], data.get('frequencies') or {}
+    elif isinstance(data, list):
+        return data, {}
+    raise ValueError("Invalid JSON format")
+
+
+def read_words_json(path):
+    """Read a words.json file ({"words": [...]} or a plain list)"""
+    return read_dictionary_json(path)[0]
+
+
+def diff_words(old_words, new_words):
+    """Return (added, removed) sorted word lists between two word lists"""
+    old_set = set(old_words)
+    new_set = set(new_words)
+    return sorted(new_set - old_set), sorted(old_set - new_set)
+
+
+def pack_words(sorted_words):
+    """Pack normalized words into (blob, offsets, fanout, lengths) buffers"""
+    encoded = [word.encode('utf-8') for word in sorted_words]
+    blob = b''.join(encoded)
+    if len(blob) > 0xFFFFFFFF:
+        raise ValueError("Dictionary too large for 32-bit offsets")
+    offsets = array('I', [0])
+    offsets.extend(accumulate(map(len, encoded)))
+    lengths = bytes(min(len(word), 255) for word in sorted_words)
+
+    fanout = array('I', [0] * FANOUT_SIZE)
+    for i, data in enumerate(encoded):
+        fanout[data[0] + 1] = i + 1
+    # Empty buckets inherit the end of the previous one
+    for b in range(1, FANOUT_SIZE):
+        fanout[b] = max(fanout[b], fanout[b - 1])
+    return blob, offsets, fanout, lengths
+
+
+def frequency_table(sorted_words, frequencies):
+    """Each normalized word's count from a {word: count} mapping, or None without one"""
+    if not frequencies:
+        return None
+    ids = {word: i for i, word in enumerate(sorted_words)}
+    table = array('f', bytes(4 * len(sorted_words)))
+    for word, count in frequencies.items():
+        i = ids.get(str(word).lower())
+        if i is not None:
+            table[i] = max(float(count), 0.0)
+    return table
+
+
+def to_little_endian(values):
+    """Return u32 or f32 array bytes in file byte order"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def compile_dictionary(json_path, bin_path):
+    """Compile words.json, with its frequencies, into the memory-mappable binary format"""
+    raw_words, frequencies = read_dictionary_json(json_path)
+    words = normalize_words(raw_words)
+    blob, offsets, fanout, lengths = pack_words(words)
+    counts = frequency_table(words, frequencies)
+
+    offsets_pos = HEADER.size
+    fanout_pos = offsets_pos + 4 * len(offsets)
+    frequencies_pos = fanout_pos + 4 * FANOUT_SIZE if counts else 0
+    lengths_pos = fanout_pos + 4 * FANOUT_SIZE + (4 * len(counts) if counts else 0)
+    blob_pos = lengths_pos + len(lengths)
+    header = HEADER.pack(MAGIC, VERSION, len(words), count_nodes(words),
+                         offsets_pos, fanout_pos, frequencies_pos, lengths_pos, blob_pos)
+
+    tmp_path = bin_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(to_little_endian(offsets))
+        f.write(to_little_endian(fanout))
+        if counts:
+            f.write(to_little_endian(counts))
+        f.write(lengths)
+        f.write(blob)
+    os.replace(tmp_path, bin_path)
+    return len(words)
+
+
+class PackedWords(Sequence):
+    """Deduplicated word store: one UTF-8 blob plus an offsets table.
+
+    Word IDs are positions in sorted order; strings are decoded on access
+    instead of being kept alive as separate objects. Pass normalized=True
+    for words that already went through normalize_words. frequencies is a
+    per-ID table of word counts when the store carries one.
+    """
+
+    frequencies = None
+
+    def __init__(self, words=(), normalized=False):
+        if not normalized:
+            words = normalize_words(words)
+        self.count = len(words)
+        self.node_count = count_nodes(words)
+        blob, self.offsets, self.fanout, lengths = pack_words(words)
+        self.blob = memoryview(blob)
+        self.lengths = memoryview(lengths)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        offsets, blob = self.offsets, self.blob
+        for i in range(self.count):
+            yield str(blob[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def bucket(self, prefix):
+        """Return the ID range sharing prefix's first byte"""
+        first = prefix.encode('utf-8')[0]
+        return self.fanout[first], self.fanout[first + 1]
+
+    def memory_usage(self):
+        """Return (heap bytes, mapped bytes) held by the store"""
+        tables = self.blob.nbytes + self.lengths.nbytes
+        tables += self.offsets.itemsize * len(self.offsets)
+        tables += self.fanout.itemsize * len(self.fanout)
+        return tables, 0
+
+
+class CompiledDictionary(PackedWords):
+    """Read-only, memory-mapped view of a compiled dictionary"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+        header = HEADER.unpack_from(self.mm, 0) if len(self.mm) >= HEADER.size else None
+        if not header or header[0] != MAGIC or header[1] != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a compiled dictionary (v{VERSION})")
+
+        (_, _, count, self.node_count, offsets_pos, fanout_pos,
+         frequencies_pos, lengths_pos, blob_pos) = header
+        self.count = count
+        view = memoryview(self.mm)
+        self.offsets = self.table(view[offsets_pos:offsets_pos + 4 * (count + 1)])
+        self.fanout = self.table(view[fanout_pos:fanout_pos + 4 * FANOUT_SIZE])
+        if frequencies_pos:
+            self.frequencies = self.table(view[frequencies_pos:frequencies_pos + 4 * count], 'f')
+        self.lengths = view[lengths_pos:lengths_pos + count]
+        self.blob = view[blob_pos:]
+        view.release()
+
+    @staticmethod
+    def table(view, typecode='I'):
+        """Interpret little-endian u32 (or f32) bytes without copying where possible"""
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+        table = array(typecode)
+        table.frombytes(view)
+        table.byteswap()
+        return table
+
+    def memory_usage(self):
+        """Return (heap bytes, mapped bytes) held by the store"""
+        return 0, len(self.mm)
+
+    def close(self):
+        """Release the mapping"""
+        for table in ('offsets', 'fanout', 'frequencies', 'lengths', 'blob'):
+            view = getattr(self, table, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self.mm.close()
+        self.file.close()
+
+
+def load_word_store(path):
+    """Open a compiled dictionary, or pack a words.json file"""
+    if path.lower().endswith('.json'):
+        return PackedWords(read_words_json(path))
+    return CompiledDictionary(path)
+
+
+def format_bytes(size):
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python word_store.py words.json [words.bin]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(source)[0] + '.bin'
+    total = compile_dictionary(source, target)
+    print(f"Compiled {total} words into {target} ({format_bytes(os.path.getsize(target))})")
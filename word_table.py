@@ -0,0 +1,93 @@
+import numpy as np
+
+from strategy import LETTER_CODES, OTHER
+from word_index import PrefixIndex
+
+
+def letter_bits(letters):
+    """26-bit mask of the a-z letters in a string"""
+    bits = 0
+    for code in LETTER_CODES[np.frombuffer(letters.lower().encode('utf-8'), dtype=np.uint8)]:
+        if code != OTHER:
+            bits |= 1 << int(code)
+    return bits
+
+
+class WordTable:
+    """Columnar view of a word store for multi-constraint queries.
+
+    One array per attribute, indexed by word ID: first and last letter
+    codes, letter count, and a 26-bit mask of the letters each word
+    contains. A query ANDs one boolean mask per constraint across the
+    dictionary (or only across a prefix's ID range, when one is given).
+    """
+
+    def __init__(self, words):
+        self.index = words if isinstance(words, PrefixIndex) else PrefixIndex(words)
+        store = self.index.words
+        blob = np.frombuffer(store.blob, dtype=np.uint8)
+        self.offsets = np.frombuffer(store.offsets, dtype=np.uint32).astype(np.int64)
+        self.blob = blob
+        self.lengths = np.frombuffer(store.lengths, dtype=np.uint8)
+        self.first = LETTER_CODES[blob[self.offsets[:-1]]]
+        self.last = LETTER_CODES[blob[self.offsets[1:] - 1]]
+
+        codes = LETTER_CODES[blob]
+        bits = np.where(codes < OTHER, np.left_shift(1, codes, dtype=np.uint32), 0).astype(np.uint32)
+        if len(self.lengths):
+            self.masks = np.bitwise_or.reduceat(bits, self.offsets[:-1])
+        else:
+            self.masks = np.zeros(0, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def mask(self, starts_with='', ends_with='', min_length=1, max_length=None,
+             include='', exclude='', played=None):
+        """Return (lo, mask) where mask[i] says whether word lo + i qualifies.
+
+        include/exclude are letters that must all appear / must not appear.
+        Words in played, if given, are excluded.
+        """
+        lo, hi = self.index.prefix_range(starts_with.lower())
+        lengths = self.lengths[lo:hi]
+        keep = lengths >= min_length
+        if max_length is not None:
+            keep &= lengths <= max_length
+
+        required = letter_bits(include)
+        forbidden = letter_bits(exclude)
+        if required or forbidden:
+            masks = self.masks[lo:hi]
+            if required:
+                keep &= (masks & required) == required
+            if forbidden:
+                keep &= (masks & forbidden) == 0
+
+        suffix = ends_with.lower().encode('utf-8')
+        if suffix:
+            keep &= self.last[lo:hi] == LETTER_CODES[suffix[-1]]
+            # Every non-letter byte shares the OTHER code, so those need the bytes compared
+            if len(suffix) > 1 or LETTER_CODES[suffix[-1]] == OTHER:
+                ends = self.offsets[lo + 1:hi + 1]
+                keep &= ends - self.offsets[lo:hi] >= len(suffix)
+                # Only the survivors are compared byte by byte
+                ids = np.flatnonzero(keep)
+                tails = ends[ids, np.newaxis] - len(suffix) + np.arange(len(suffix))
+                same = (self.blob[tails] == np.frombuffer(suffix, dtype=np.uint8)).all(axis=1)
+                keep[ids[~same]] = False
+
+        if played is not None and hi > lo:
+            keep &= ~played.range_mask(lo, hi)
+        return lo, keep
+
+    def query(self, starts_with='', ends_with='', min_length=1, max_length=None,
+              include='', exclude='', played=None, longest_first=True, limit=None):
+        """Return matching words, longest (or shortest) first, then alphabetical"""
+        lo, keep = self.mask(starts_with, ends_with, min_length, max_length, include, exclude, played)
+        ids = np.flatnonzero(keep) + lo
+        lengths = self.lengths[ids].astype(np.int16)
+        order = np.argsort(-lengths if longest_first else lengths, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [self.index.words[int(i)] for i in ids[order]]